@@ -0,0 +1,155 @@
+"""Benchmark the load, generate and serialize stages of generator.py
+
+Runs every stage against the shipped List/ catalogs and against synthetic
+catalogs scaled up from them, and prints the results as JSON:
+
+    python benchmarks/bench_generator.py --scales 1,10,100 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import yaml  # noqa: E402
+import generator  # noqa: E402
+
+LIST_DIR = os.path.join(ROOT_DIR, generator.LIST_DIR)
+QUESTS_DIR = os.path.join(ROOT_DIR, generator.QUESTS_DIR)
+SEED = 'benchmark'
+
+def catalog_files():
+    """Catalog files read by the generator"""
+    return sorted({spec['catalog'] for spec in generator.QUEST_TYPES.values() if 'catalog' in spec})
+
+def scale_entries(entries, scale):
+    return [name if copy == 0 else f'{name}_{copy}' for copy in range(scale) for name in entries]
+
+def write_scaled_catalogs(list_dir, scale):
+    """Write every catalog with each entry repeated 'scale' times under a new name"""
+    for filename in catalog_files():
+        data = generator.load_yaml_file(filename, LIST_DIR, cache_dir=None)
+        if isinstance(data, dict):
+            data = {rarity: scale_entries(entries, scale) for rarity, entries in data.items()}
+        else:
+            data = scale_entries(data, scale)
+        with open(os.path.join(list_dir, filename), 'w') as file:
+            yaml.dump(data, file, Dumper=generator.YamlDumper, default_flow_style=False)
+
+def measure(function, repeat):
+    """Best wall time of 'repeat' calls, plus the peak memory of one traced call"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+def record(results, scale, stage, category, quests, seconds, peak):
+    results.append({
+        'scale': scale,
+        'stage': stage,
+        'category': category,
+        'quests': quests,
+        'seconds': round(seconds, 6),
+        'quests_per_second': round(quests / seconds, 1) if quests and seconds else None,
+        'peak_memory_bytes': peak,
+    })
+
+def bench_scale(scale, list_dir, work_dir, repeat, results):
+    cache_dir = os.path.join(work_dir, 'cache')
+    for filename in catalog_files():
+        _, seconds, peak = measure(lambda: generator.load_yaml_file(filename, list_dir, cache_dir=None), repeat)
+        record(results, scale, 'load', filename, None, seconds, peak)
+        generator.load_catalog(filename, list_dir, cache_dir)
+        _, seconds, peak = measure(lambda: generator.load_catalog(filename, list_dir, cache_dir), repeat)
+        record(results, scale, 'load_cached', filename, None, seconds, peak)
+
+    quest_generator = generator.QuestGenerator(list_dir, QUESTS_DIR, cache_dir=None)
+    quests_by_category = {}
+    for category in generator.CATEGORIES:
+        quests, seconds, peak = measure(lambda: quest_generator.generate(category, SEED), repeat)
+        record(results, scale, 'generate', category, len(quests), seconds, peak)
+        del quests
+        records, seconds, peak = measure(lambda: quest_generator.generate_records(category, SEED), repeat)
+        record(results, scale, 'generate_records', category, len(records), seconds, peak)
+        quests_by_category[category] = records
+        batch, seconds, peak = measure(lambda: quest_generator.generate_batch(category, SEED), repeat)
+        record(results, scale, 'generate_batch', category, len(batch), seconds, peak)
+        del batch
+
+    quests_dir = os.path.join(work_dir, 'Quests')
+    os.makedirs(quests_dir, exist_ok=True)
+    for category, quests in quests_by_category.items():
+        # Remove the previous file so every call actually writes; 'serialize'
+        # starts from an empty fragment cache and 'serialize_cached' from a warm one
+        def save(cold):
+            path = os.path.join(quests_dir, f'{category}.yml')
+            if os.path.exists(path):
+                os.remove(path)
+            if cold:
+                generator.FRAGMENT_CACHE.clear()
+            return generator.save_category(category, quests, quests_dir)
+        _, seconds, peak = measure(lambda: save(True), repeat)
+        record(results, scale, 'serialize', category, len(quests), seconds, peak)
+        _, seconds, peak = measure(lambda: save(False), repeat)
+        record(results, scale, 'serialize_cached', category, len(quests), seconds, peak)
+
+    def save_extra():
+        path = os.path.join(quests_dir, 'extra.yml')
+        if os.path.exists(path):
+            os.remove(path)
+        fragments_by_category = [generator.iter_quest_fragments(f'{category}.yml', quests_dir)
+                                 for category in quests_by_category]
+        return generator.save_extra(fragments_by_category, quests_dir)
+    total = sum(len(quests) for quests in quests_by_category.values())
+    _, seconds, peak = measure(save_extra, repeat)
+    record(results, scale, 'serialize', 'extra', total, seconds, peak)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='1,10,100,1000',
+                        help='comma separated catalog scale factors, 1 is the shipped List/ (default: 1,10,100,1000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per measurement, the best is reported (default: 3)')
+    parser.add_argument('--output', '-o', help='write the JSON report to a file instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in (int(scale) for scale in args.scales.split(',')):
+        with tempfile.TemporaryDirectory() as work_dir:
+            if scale == 1:
+                list_dir = LIST_DIR
+            else:
+                list_dir = os.path.join(work_dir, 'List')
+                os.makedirs(list_dir)
+                write_scaled_catalogs(list_dir, scale)
+            bench_scale(scale, list_dir, work_dir, args.repeat, results)
+            print(f"Scale {scale}x done", file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'libyaml': generator.YamlDumper is not yaml.SafeDumper,
+        'numpy': generator.load_numpy() is not None,
+        'results': results,
+    }
+    content = json.dumps(report, indent=2) + '\n'
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(content)
+    else:
+        sys.stdout.write(content)
+
+if __name__ == '__main__':
+    main()
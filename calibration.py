@@ -0,0 +1,171 @@
+"""Simulate how long players take to complete the generated quests and suggest tiers and points
+
+    python calibration.py --players 10000 --jobs 4 --seed 42 -o calibration.json
+"""
+import sys
+import json
+import math
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from generator import (
+    DIFFICULTIES, DIFFICULTY_BOUNDS, QUEST_CONFIG, QUEST_TYPES, QuestGenerator,
+    new_seed, seed_int, write_atomic,
+)
+from sampling import load_numpy
+
+# Median progress per minute of play for each quest type, and the spread of
+# that rate between players (sigma of a log-normal). These are estimates,
+# to be replaced by rates measured on the servers
+PLAYER_RATES = {
+    'kill-mob': (2.0, 0.6),
+    'block-break': (20.0, 0.6),
+    'block-place': (15.0, 0.5),
+    'consume': (1.5, 0.4),
+    'smelt': (4.0, 0.5),
+    'tame': (0.5, 0.7),
+    'ride-mob': (200.0, 0.5),
+    'shear': (3.0, 0.6),
+    'milk': (3.0, 0.6),
+    'move': (200.0, 0.4),
+    'swim': (100.0, 0.4),
+    'sprint': (300.0, 0.3),
+    'sneak': (15.0, 0.7),
+    'glide': (900.0, 0.6),
+    'fly': (600.0, 0.6),
+    'gain-experience': (40.0, 0.8),
+}
+
+# Rate of the rarer catalog entries relative to the common ones
+RARITY_RATE_FACTORS = {'common': 1.0, 'rare': 0.5, 'hard': 0.15}
+
+# Median completion time in minutes up to which a quest is easy, then medium
+TIER_MINUTES = (10, 30)
+
+# Minutes of median play a point is worth, for the suggested point values
+MINUTES_PER_POINT = 5
+
+# Player-quest pairs simulated together, which bounds the memory of a
+# worker; chunks only depend on the number of players, not on --jobs
+CHUNK_PAIRS = 1 << 21
+
+def quest_rarity(quest):
+    """The rarity tier of a quest from its ID prefix, or None for categories without tiers"""
+    for rarity, prefix, _ in QUEST_TYPES[quest.category].get('tiers', ()):
+        if quest.id.startswith(prefix):
+            return rarity
+    return None
+
+def _simulate_chunk(progress, medians, sigmas, players, seed):
+    # Median and 90th percentile completion minutes of every quest of a chunk.
+    # Each player has a log-normal rate and progress arrives as a Poisson
+    # process, so completing n units takes a Gamma(n, 1 / rate) time.
+    # Without NumPy the simulation falls back to pure Python
+    numpy = load_numpy()
+    if numpy is not None:
+        rng = numpy.random.default_rng(seed)
+        rates = rng.lognormal(numpy.log(medians)[:, None], numpy.array(sigmas)[:, None], (len(progress), players))
+        times = rng.gamma(numpy.array(progress, dtype=float)[:, None], 1 / rates)
+        p50, p90 = numpy.percentile(times, [50, 90], axis=1)
+        return p50.tolist(), p90.tolist()
+    rng = random.Random(seed)
+    p50, p90 = [], []
+    for units, median, sigma in zip(progress, medians, sigmas):
+        times = sorted(rng.gammavariate(units, 1 / rng.lognormvariate(math.log(median), sigma))
+                       for _ in range(players))
+        p50.append(times[len(times) // 2])
+        p90.append(times[min(len(times) - 1, len(times) * 9 // 10)])
+    return p50, p90
+
+def simulate(quests, players=10000, seed=0, jobs=1):
+    """Simulate 'players' players on every quest, returning (quest, p50, p90) completion minutes"""
+    quests = list(quests)
+    chunk_size = max(1, CHUNK_PAIRS // players)
+    chunks = []
+    for start in range(0, len(quests), chunk_size):
+        chunk = quests[start:start + chunk_size]
+        progress, medians, sigmas = [], [], []
+        for quest in chunk:
+            median, sigma = PLAYER_RATES[quest.type]
+            progress.append(quest.progress)
+            medians.append(median * RARITY_RATE_FACTORS.get(quest_rarity(quest), 1.0))
+            sigmas.append(sigma)
+        chunks.append((progress, medians, sigmas, players, seed_int(seed, 'calibration', start)))
+
+    if jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*chunks)))
+    else:
+        results = [_simulate_chunk(*chunk) for chunk in chunks]
+    p50 = [value for chunk_p50, _ in results for value in chunk_p50]
+    p90 = [value for _, chunk_p90 in results for value in chunk_p90]
+    return list(zip(quests, p50, p90))
+
+def tier_for_minutes(minutes):
+    """Difficulty of a quest from its median completion time"""
+    for difficulty, bound in zip(DIFFICULTIES, TIER_MINUTES):
+        if minutes <= bound:
+            return difficulty
+    return DIFFICULTIES[-1]
+
+def calibrate(results):
+    """Suggest tier thresholds and points per quest type and rarity from simulate() results
+
+    A threshold is the progress a median player reaches in the TIER_MINUTES
+    bounds, from the median of progress per simulated minute. Points are the
+    median minutes of a tier divided by MINUTES_PER_POINT.
+    """
+    groups = {}
+    for quest, p50, p90 in results:
+        groups.setdefault((quest.type, quest_rarity(quest)), []).append((quest, p50, p90))
+
+    report = []
+    for (quest_type, rarity), group in sorted(groups.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+        speeds = sorted(quest.progress / p50 for quest, p50, _ in group)
+        speed = speeds[len(speeds) // 2]
+        minutes_by_tier = {}
+        mistiered = 0
+        for quest, p50, _ in group:
+            tier = tier_for_minutes(p50)
+            minutes_by_tier.setdefault(tier, []).append(p50)
+            mistiered += tier != quest.difficulty
+        report.append({
+            'type': quest_type,
+            'rarity': rarity,
+            'quests': len(group),
+            'progress_per_minute': round(speed, 3),
+            'median_minutes': round(sorted(p50 for _, p50, _ in group)[len(group) // 2], 2),
+            'p90_minutes': round(sorted(p90 for _, _, p90 in group)[len(group) // 2], 2),
+            'suggested_thresholds': [max(1, round(bound * speed)) for bound in TIER_MINUTES],
+            'current_thresholds': DIFFICULTY_BOUNDS,
+            'mistiered': mistiered,
+            'suggested_points': {
+                tier: max(1, round(sorted(minutes)[len(minutes) // 2] / MINUTES_PER_POINT))
+                for tier, minutes in minutes_by_tier.items()
+            },
+            'current_points': {difficulty: QUEST_CONFIG[difficulty]['points'] for difficulty in DIFFICULTIES},
+        })
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Calibrate quest tiers and points with a Monte Carlo simulation.')
+    parser.add_argument('--players', type=int, default=10000, help='players simulated per quest (default: 10000)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='number of worker processes (default: 1)')
+    parser.add_argument('--seed', help='seed of the quests and the simulation (default: a random seed)')
+    parser.add_argument('--output', '-o', help='write the JSON report to a file instead of stdout')
+    args = parser.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else new_seed()
+    quests = QuestGenerator().generate_pool(seed).extra()
+    report = {'seed': str(seed), 'players': args.players, 'numpy': load_numpy() is not None,
+              'types': calibrate(simulate(quests, args.players, seed, args.jobs))}
+    content = json.dumps(report, indent=2) + '\n'
+    if args.output:
+        write_atomic(args.output, [content])
+    else:
+        sys.stdout.write(content)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""Serve player passes and categories from warm catalogs over localhost HTTP or a Unix socket
+
+    python daemon.py --seed season-12 --port 8765
+    python daemon.py --seed season-12 --socket /run/battlepass.sock
+
+    GET  /pass?player=NAME[&seed=SEED]       quests of a player's pass
+    GET  /category/NAME[?seed=SEED]          quests of a category
+    GET  /health                             status and queue length
+    POST /reload                             reload the List/ catalogs
+"""
+import os
+import sys
+import json
+import signal
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+
+import generator
+from generator import CACHE_DIR, LIST_DIR, QUEST_TYPES, QUESTS_DIR, QuestGenerator
+
+# Most requests handed to a worker at once
+MAX_BATCH = 64
+
+# Largest request head accepted, to bound memory per connection
+MAX_HEADER_BYTES = 16384
+
+# Largest request body accepted. No endpoint uses a body, so it is only read
+# to find the next request on the connection
+MAX_BODY_BYTES = 16384
+
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class RequestError(Exception):
+    """A request that is answered with an HTTP error status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# Generator of each worker process, set up by _init_worker
+_worker_generator = None
+
+def _init_worker(quest_generator):
+    global _worker_generator
+    _worker_generator = quest_generator
+
+def _generate_job(requests):
+    # Runs in a worker process: answer a batch of (kind, name, seed) requests
+    # with (status, JSON body) pairs, so one bad request does not fail the batch
+    results = []
+    for kind, name, seed in requests:
+        try:
+            if kind == 'pass':
+                quests = _worker_generator.generate_player_pass(name, seed)
+                body = {'player': name, 'seed': seed, 'quests': quests}
+            else:
+                body = {'category': name, 'seed': seed, 'quests': _worker_generator.generate(name, seed)}
+            results.append((200, json.dumps(body, ensure_ascii=False)))
+        except Exception as error:
+            results.append((500, json.dumps({'error': str(error)})))
+    return results
+
+class GenerationDaemon:
+    """Batches generation requests onto a bounded pool of warm worker processes
+
+    A worker slot is taken before the queue is read, so while every worker
+    is busy the requests pile up and are then sent together, up to
+    MAX_BATCH at a time. An idle daemon sends each request on its own
+    straight away, so batching never adds latency.
+    """
+
+    def __init__(self, seed, workers=2, list_dir=LIST_DIR, quests_dir=QUESTS_DIR, cache_dir=CACHE_DIR):
+        self.seed = str(seed)
+        self.workers = workers
+        self.list_dir, self.quests_dir, self.cache_dir = list_dir, quests_dir, cache_dir
+        self.pool = None
+        self.queue = None
+        self.slots = None
+        self.reloading = None
+        # Running batches; the event loop only keeps weak references to tasks
+        self.tasks = set()
+        self.batches = 0
+        self.requests = 0
+
+    def _start_pool(self):
+        quest_generator = QuestGenerator(self.list_dir, self.quests_dir, self.cache_dir)
+        # Catalogs and pass pools are loaded once here instead of in every worker
+        quest_generator.warm()
+        pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(quest_generator,))
+        # Start every worker now so the first requests do not pay for it
+        for future in [pool.submit(_generate_job, []) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.workers)
+        self.reloading = asyncio.Lock()
+        self.pool = await loop.run_in_executor(None, self._start_pool)
+        self._batcher = asyncio.create_task(self._batch_requests())
+
+    async def reload(self):
+        """Reload the catalogs into a new pool; batches already sent finish on the old one
+
+        Reloads run one at a time, so every pool that is replaced is shut down.
+        """
+        loop = asyncio.get_running_loop()
+        async with self.reloading:
+            pool, self.pool = self.pool, await loop.run_in_executor(None, self._start_pool)
+        pool.shutdown(wait=False)
+
+    async def close(self):
+        self._batcher.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, kind, name, seed=None):
+        """Queue a 'pass' or 'category' request and wait for its (status, JSON body)"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(((kind, name, str(seed) if seed is not None else self.seed), future))
+        return await future
+
+    async def _batch_requests(self):
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            while len(batch) < MAX_BATCH and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            task = asyncio.create_task(self._run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.pool, _generate_job, [request for request, _ in batch])
+        except Exception as error:
+            results = [(500, json.dumps({'error': str(error)}))] * len(batch)
+        finally:
+            self.slots.release()
+        self.batches += 1
+        self.requests += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def handle(self, method, target):
+        """Answer one HTTP request with (status, JSON body)"""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/')
+        if path == '/health':
+            return 200, json.dumps({'status': 'ok', 'seed': self.seed, 'queued': self.queue.qsize(),
+                                    'requests': self.requests, 'batches': self.batches})
+        if path == '/reload':
+            if method != 'POST':
+                raise RequestError(405, "Use POST to reload the catalogs")
+            await self.reload()
+            return 200, json.dumps({'status': 'reloaded'})
+        if method != 'GET':
+            raise RequestError(405, f"{method} is not supported")
+        if path == '/pass':
+            if not query.get('player'):
+                raise RequestError(400, "Missing 'player'")
+            return await self.submit('pass', query['player'], query.get('seed'))
+        if path.startswith('/category/'):
+            category = path[len('/category/'):]
+            if category not in QUEST_TYPES:
+                raise RequestError(404, f"Unknown quest category: {category}")
+            return await self.submit('category', category, query.get('seed'))
+        raise RequestError(404, f"Not found: {url.path}")
+
+    async def serve_connection(self, reader, writer):
+        """Answer HTTP/1.1 requests on a connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 413, json.dumps({'error': 'Request head too large'}), False)
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                keep_alive = True
+                try:
+                    method, target, version = lines[0].split(' ')
+                    headers = dict(line.split(':', 1) for line in lines[1:] if line)
+                    headers = {key.strip().lower(): value.strip() for key, value in headers.items()}
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(f"Negative content length: {length}")
+                    if length > MAX_BODY_BYTES:
+                        # The body is left unread, so the connection cannot be reused
+                        keep_alive = False
+                        raise RequestError(413, "Request body too large")
+                    # Request bodies are not used, but must be read to find the next request
+                    await reader.readexactly(length)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                    status, body = await self.handle(method, target)
+                except RequestError as error:
+                    status, body = error.status, json.dumps({'error': str(error)})
+                except ValueError:
+                    status, body, keep_alive = 400, json.dumps({'error': 'Malformed request'}), False
+                await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, keep_alive):
+        body = body.encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+async def serve(daemon, host='127.0.0.1', port=8765, socket_path=None):
+    """Run the daemon until it is interrupted or terminated"""
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:  # no signal handlers in the Windows event loop
+        pass
+    await daemon.start()
+    if socket_path:
+        server = await asyncio.start_unix_server(daemon.serve_connection, socket_path, limit=MAX_HEADER_BYTES)
+        address = socket_path
+    else:
+        server = await asyncio.start_server(daemon.serve_connection, host, port, limit=MAX_HEADER_BYTES)
+        address = f'http://{host}:{port}'
+    print(f"Serving quests on {address} with {daemon.workers} workers. Seed: {daemon.seed}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await daemon.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve quest generation requests from warm catalogs.')
+    parser.add_argument('--seed', help='seed of the passes and categories served (default: a random seed)')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on (default: 8765)')
+    parser.add_argument('--socket', metavar='PATH', help='listen on a Unix socket instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=2, help='number of worker processes (default: 2)')
+    args = parser.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else generator.new_seed()
+    try:
+        asyncio.run(serve(GenerationDaemon(seed, args.workers), args.host, args.port, args.socket))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""Compile event quest files from compact specs and validate the quest tree
+
+    python events.py validate
+    python events.py compile specs/summer.yml
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+from collections import namedtuple
+
+import yaml
+
+import generator
+from generator import QUESTS_DIR, QUEST_CONFIG, Quest, QuestRandom, YamlLoader
+
+EVENTS_DIR = os.path.join(QUESTS_DIR, 'events')
+
+# Format of the category start/end date and time in event files
+EVENT_DATE_FORMAT = '%d/%m/%Y %H:%M'
+
+# Files in Quests/ that only repeat the quests of other files
+AGGREGATE_FILES = {'extra.yml'}
+
+QuestEntry = namedtuple('QuestEntry', 'file quest_id type variable')
+Issue = namedtuple('Issue', 'severity file quest_id message')
+
+class DuplicateKeyLoader(YamlLoader):
+    """YAML loader that records mapping keys defined twice
+
+    PyYAML silently keeps the last value of a repeated key, which hides a
+    quest ID used twice in the same file.
+    """
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.duplicates = []
+
+    def construct_mapping(self, node, deep=False):
+        seen = set()
+        for key_node, _ in node.value:
+            key = self.construct_object(key_node, deep=deep)
+            try:
+                if key in seen:
+                    self.duplicates.append((key_node.start_mark.line + 1, key))
+                seen.add(key)
+            except TypeError:  # unhashable key, reported by the constructor
+                pass
+        return super().construct_mapping(node, deep)
+
+def load_checked(path):
+    """Parse a YAML file, returning its data and the (line, key) pairs defined twice"""
+    with open(path, 'r') as file:
+        loader = DuplicateKeyLoader(file)
+        try:
+            return loader.get_single_data(), loader.duplicates
+        finally:
+            loader.dispose()
+
+def parse_event_time(block):
+    """Parse a category start/end block of an event file"""
+    return datetime.strptime(f"{block['date']} {block['time']}", EVENT_DATE_FORMAT)
+
+class QuestIndex:
+    """Index of every quest ID, type and variable under Quests/ and Quests/events/
+
+    Lookups by ID, type or (type, variable) are dict lookups, so duplicate
+    and conflict checks over the whole tree stay linear in its size.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.categories = {}
+        self.by_id = {}
+        self.by_type = {}
+        self.by_type_variable = {}
+        self.issues = []
+
+    @classmethod
+    def build(cls, quests_dir=QUESTS_DIR):
+        """Index the quest files in quests_dir and its events folder"""
+        index = cls()
+        for filename in sorted(os.listdir(quests_dir)):
+            if filename.endswith('.yml') and filename not in AGGREGATE_FILES:
+                index.add_file(os.path.join(quests_dir, filename), filename)
+        events_dir = os.path.join(quests_dir, 'events')
+        if os.path.isdir(events_dir):
+            for filename in sorted(os.listdir(events_dir)):
+                if filename.endswith('.yml'):
+                    index.add_file(os.path.join(events_dir, filename), f'events/{filename}', event=True)
+        return index
+
+    def add_file(self, path, name, event=False):
+        """Index the quests of one file; 'name' is how the file is reported"""
+        try:
+            data, duplicates = load_checked(path)
+        except yaml.YAMLError as error:
+            self.issues.append(Issue('error', name, None, f"Invalid YAML: {error}"))
+            return
+        for line, key in duplicates:
+            self.issues.append(Issue('error', name, key, f"Key defined twice (line {line})"))
+
+        data = data or {}
+        if event:
+            self.categories[name] = data.get('category')
+            quests = data.get('quests') or {}
+        else:
+            quests = data
+        self.files[name] = quests
+        for quest_id, quest in quests.items():
+            quest_id = str(quest_id)
+            quest = quest if isinstance(quest, dict) else {}
+            entry = QuestEntry(name, quest_id, quest.get('type'), quest.get('variable'))
+            self.by_id.setdefault(quest_id, []).append(entry)
+            self.by_type.setdefault(entry.type, []).append(entry)
+            self.by_type_variable.setdefault((entry.type, entry.variable), []).append(entry)
+
+    def find(self, quest_id):
+        """Every file entry using a quest ID"""
+        return self.by_id.get(str(quest_id), [])
+
+    def quests_of_type(self, quest_type, variable=None):
+        """Every entry of a quest type, optionally only for one variable"""
+        if variable is None:
+            return self.by_type.get(quest_type, [])
+        return self.by_type_variable.get((quest_type, variable), [])
+
+    def validate(self):
+        """Check every indexed file, returning the issues found"""
+        issues = list(self.issues)
+        for name, quests in self.files.items():
+            for quest_id, quest in quests.items():
+                issues.extend(validate_quest(name, str(quest_id), quest))
+        for name, category in self.categories.items():
+            issues.extend(validate_event_category(name, category))
+        issues.extend(self._conflicts())
+        return issues
+
+    def _conflicts(self):
+        # A quest ID must belong to one file only: extra.yml and the plugin
+        # keep a single quest per ID. An event should also not have two
+        # quests for the same type and variable
+        issues = []
+        for quest_id, entries in self.by_id.items():
+            files = list(dict.fromkeys(entry.file for entry in entries))
+            if len(files) > 1:
+                for name in files:
+                    others = [other for other in files if other != name]
+                    issues.append(Issue('error', name, quest_id, f"ID also used in {', '.join(others)}"))
+        for name in self.categories:
+            seen = {}
+            for quest_id, quest in self.files[name].items():
+                if isinstance(quest, dict) and 'variable' in quest:
+                    key = (quest.get('type'), quest['variable'])
+                    if key in seen:
+                        issues.append(Issue('warning', name, str(quest_id),
+                                            f"Same type and variable as {seen[key]}: {key[0]} {key[1]}"))
+                    seen.setdefault(key, str(quest_id))
+        return issues
+
+def _positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+def validate_quest(name, quest_id, quest):
+    """Check the keys of a single quest"""
+    if not isinstance(quest, dict):
+        return [Issue('error', name, quest_id, "Quest is not a mapping")]
+    issues = []
+    for key in ('type', 'name'):
+        if not quest.get(key):
+            issues.append(Issue('error', name, quest_id, f"Missing '{key}'"))
+    required = [key for key in quest if key.startswith('required-')]
+    if not required:
+        issues.append(Issue('error', name, quest_id, "Missing 'required-progress'"))
+    for key in required:
+        if not _positive_int(quest[key]):
+            issues.append(Issue('error', name, quest_id, f"'{key}' must be a positive integer"))
+    if not _positive_int(quest.get('points')):
+        issues.append(Issue('error', name, quest_id, "'points' must be a positive integer"))
+
+    item = quest.get('item')
+    if not isinstance(item, dict):
+        issues.append(Issue('error', name, quest_id, "Missing 'item'"))
+        return issues
+    for key in ('material', 'name', 'lore'):
+        if not item.get(key):
+            issues.append(Issue('error', name, quest_id, f"Missing 'item.{key}'"))
+    expected = [config['exp_multiplier'] for config in QUEST_CONFIG.values() if config['points'] == quest.get('points')]
+    exp_lines = [line for line in item.get('lore') or () if isinstance(line, str) and 'EXP: &f' in line]
+    if expected and exp_lines and not any(line.endswith(expected[0]) for line in exp_lines):
+        issues.append(Issue('warning', name, quest_id,
+                            f"Lore EXP does not match {quest['points']} points ({expected[0]})"))
+    return issues
+
+def validate_event_category(name, category):
+    """Check the category block of an event file"""
+    if not isinstance(category, dict):
+        return [Issue('error', name, None, "Missing 'category'")]
+    issues = []
+    times = {}
+    for key in ('start', 'end'):
+        try:
+            times[key] = parse_event_time(category[key])
+        except (KeyError, TypeError, ValueError):
+            issues.append(Issue('error', name, None, f"Invalid category {key}, expected date DD/MM/YYYY and time HH:MM"))
+    if len(times) == 2 and times['start'] >= times['end']:
+        issues.append(Issue('error', name, None, "Category ends before it starts"))
+    if not category.get('name'):
+        issues.append(Issue('error', name, None, "Missing category 'name'"))
+    return issues
+
+def compile_event(spec, quest_generator):
+    """Build an event file from a compact spec
+
+    The spec gives the event 'name', 'theme', 'material', 'start' and 'end'
+    (DD/MM/YYYY HH:MM), the quest ID 'prefix', an optional 'seed' and the
+    'pools' to draw quests from. Each pool names a generator 'category', an
+    optional 'rarity' for categories split by rarity, a 'count' and an
+    optional [low, high] 'progress' range that replaces the range of every
+    entry drawn.
+    """
+    start = datetime.strptime(spec['start'], EVENT_DATE_FORMAT)
+    end = datetime.strptime(spec['end'], EVENT_DATE_FORMAT)
+    if start >= end:
+        raise ValueError(f"Event {spec['name']!r} ends before it starts")
+    seed = spec.get('seed', spec['name'])
+
+    quests = {}
+    number = 0
+    for pool_index, pool in enumerate(spec['pools']):
+        category = pool['category']
+        # Each entry keeps the progress range of its own tier or catalog entry
+        # unless the pool sets one
+        candidates = [
+            (name, pool.get('progress') or entry_range)
+            for name, entry_range in quest_generator.category_entries(category, pool.get('rarity'))
+        ]
+        if not candidates:
+            raise ValueError(f"Pool {pool_index + 1} of {spec['name']!r} has no {category} entries to draw from")
+
+        rng = QuestRandom(seed, 'event', pool_index)
+        picked = set()
+        while len(picked) < min(pool.get('count', 1), len(candidates)):
+            index = rng.randint(0, len(candidates) - 1)
+            if index in picked:
+                continue
+            picked.add(index)
+            number += 1
+            quest_id = f"{spec['prefix']}{number}"
+            name, (low, high) = candidates[index]
+            quest = Quest(quest_id, category, name, rng.randint(low, high)).to_dict()
+            quest['item']['name'] = quest['item']['name'].replace('&e&lQUEST:&f', '&e&lEVENT:&f', 1)
+            quests[quest_id] = quest
+
+    return {
+        'actions-version': 2,
+        'category': {
+            'start': {'date': start.strftime('%d/%m/%Y'), 'time': start.strftime('%H:%M')},
+            'end': {'date': end.strftime('%d/%m/%Y'), 'time': end.strftime('%H:%M')},
+            'name': spec['name'],
+            'required-permission': spec.get('required-permission', ''),
+            'show-without-permission': True,
+            'see-quests-when-not-active': True,
+            'item': {
+                'material': spec['material'],
+                'amount': 1,
+                'name': f"&6{spec['name']}",
+                'lore': [
+                    f"&e{spec['theme']}",
+                    f"&e{start.strftime('%d/%m/%Y')} - {end.strftime('%d/%m/%Y')}",
+                    '',
+                    '%status%',
+                ],
+            },
+        },
+        'quests': quests,
+    }
+
+def print_issues(issues, file=sys.stdout):
+    for issue in issues:
+        location = issue.file if issue.quest_id is None else f'{issue.file}: {issue.quest_id}'
+        print(f'{issue.severity}: {location}: {issue.message}', file=file)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile and validate event quest files.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    validate_parser = subparsers.add_parser('validate', help='validate every file in Quests/ and Quests/events/')
+    validate_parser.add_argument('--quests-dir', default=QUESTS_DIR)
+    validate_parser.add_argument('--strict', action='store_true', help='also fail on warnings')
+
+    compile_parser = subparsers.add_parser('compile', help='compile event specs into Quests/events/')
+    compile_parser.add_argument('specs', nargs='+', help='event spec YAML files')
+    compile_parser.add_argument('--output-dir', default=EVENTS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'validate':
+        issues = QuestIndex.build(args.quests_dir).validate()
+        print_issues(issues)
+        failing = [issue for issue in issues if args.strict or issue.severity == 'error']
+        print(f"{len(issues)} issues found", file=sys.stderr)
+        return 1 if failing else 0
+
+    quest_generator = generator.QuestGenerator()
+    os.makedirs(args.output_dir, exist_ok=True)
+    for spec_path in args.specs:
+        spec = generator.load_yaml_file(os.path.basename(spec_path), os.path.dirname(spec_path) or '.', None)
+        event = compile_event(spec, quest_generator)
+        path = os.path.join(args.output_dir, spec['file'])
+        content = yaml.dump(event, Dumper=generator.YamlDumper, default_flow_style=False, sort_keys=False)
+        generator.write_atomic(path, [content])
+        print(f"Compiled {spec_path} into {path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
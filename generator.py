@@ -1,6 +1,25 @@
+import gc
 import os
+import re
+import sys
+import heapq
+import argparse
 import yaml
 import random
+import json
+import time
+import pickle
+import tracemalloc
+import hashlib
+import warnings
+from hashlib import blake2b
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from operator import attrgetter, itemgetter
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from sampling import AliasTable, load_numpy
 
 # Configuration
 QUEST_CONFIG = {
@@ -21,17 +40,105 @@ QUEST_CONFIG = {
     }
 }
 
-def load_yaml_file(filename):
-    with open(f'List/{filename}', 'r') as file:
-        return yaml.safe_load(file)
+LIST_DIR = 'List'
+QUESTS_DIR = 'Quests'
+
+# Parsed List/ catalogs are cached here between runs
+CACHE_DIR = os.path.join('.cache', 'catalogs')
+
+# Hashes of the inputs and outputs of the last run, kept in the Quests folder
+MANIFEST_FILE = '.manifest.json'
+
+# Sharded copy of extra.yml, with the index that locates every quest in it
+SHARDS_DIR = 'shards'
+SHARD_INDEX_FILE = 'index.json'
+
+# JSON, JSON Lines and msgpack copies of the quest files, see EXPORT_FORMATS
+EXPORTS_DIR = 'exports'
+
+# Every valid item material, one per line, used to check the generated quests
+MATERIALS_CATALOG = 'materials.yml'
+
+# Bump when a template change alters the generated quests
+TEMPLATE_VERSION = 1
+
+# Serialized quest bodies kept by FRAGMENT_CACHE
+FRAGMENT_CACHE_SIZE = 65536
+
+# Use the libyaml bindings when PyYAML was built with them
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+def load_catalog(filename, list_dir=LIST_DIR, cache_dir=CACHE_DIR):
+    """Load a YAML catalog, returning its parsed data and SHA-256 digest
 
-# Load all data files
-mobs_by_rarity_data = load_yaml_file('mobs_by_rarity.yml')
-food_by_rarity_data = load_yaml_file('food_by_rarity.yml')
-blocks_by_rarity_data = load_yaml_file('blocks_by_rarity.yml')
-smeltable_data = load_yaml_file('smeltable.yml')
-tamable_data = load_yaml_file('tamable.yml')
-rideable_data = load_yaml_file('rideable.yml')
+    Parsed catalogs are pickled into cache_dir, keyed on the file's path,
+    mtime and size, and loaded from there while the file is unchanged.
+    Pass cache_dir=None to always parse the YAML.
+    """
+    path = os.path.join(list_dir, filename)
+    stat = os.stat(path)
+    cache_path = None
+    if cache_dir is not None:
+        path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+        cache_path = os.path.join(cache_dir, f'{filename}-{path_hash}.pickle')
+        try:
+            with open(cache_path, 'rb') as file:
+                cached = pickle.load(file)
+            if cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                return cached['data'], cached['digest']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+
+    with open(path, 'rb') as file:
+        content = file.read()
+    data = yaml.load(content, Loader=YamlLoader)
+    digest = hashlib.sha256(content).hexdigest()
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        cached = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'digest': digest, 'data': data}
+        # Write to a temporary file first so parallel runs never read a partial cache
+        temp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            pickle.dump(cached, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    return data, digest
+
+def load_yaml_file(filename, list_dir=LIST_DIR, cache_dir=CACHE_DIR):
+    return load_catalog(filename, list_dir, cache_dir)[0]
+
+def parse_catalog(data):
+    """Split a catalog into its entry names and the details of its weighted entries
+
+    An entry is either a name or a mapping with a 'name', an optional
+    'weight' (default 1) used when sampling player passes and an optional
+    [low, high] 'progress' range that replaces the range of its category.
+    Returns (names, details): names keeps the shape of the catalog, a list
+    or a dict of rarity -> list, and details maps the name of every mapping
+    entry to its (weight, progress range or None).
+    """
+    if isinstance(data, dict):
+        names, details = {}, {}
+        for rarity, entries in data.items():
+            names[rarity], rarity_details = parse_catalog(entries)
+            details.update(rarity_details)
+        return names, details
+    names, details = [], {}
+    for entry in data or ():
+        if isinstance(entry, dict):
+            name, weight, progress = entry['name'], entry.get('weight', 1), entry.get('progress')
+            if weight < 0:
+                raise ValueError(f"Catalog entry {name!r} has a negative weight")
+            if progress is not None:
+                low, high = progress
+                if not 0 < low <= high:
+                    raise ValueError(f"Catalog entry {name!r} has an invalid progress range: {progress}")
+                progress = (low, high)
+            details[name] = (weight, progress)
+            entry = name
+        names.append(entry)
+    return names, details
 
 def get_quest_difficulty(progress):
     if progress <= 15:
@@ -45,617 +152,1754 @@ def get_quest_config(progress):
     difficulty = get_quest_difficulty(progress)
     return QUEST_CONFIG[difficulty]
 
-def generate_quest_id(existing_ids, prefix=''):
-    """Generate a unique quest ID"""
-    while True:
-        new_id = f"{prefix}{len(existing_ids) + 1}"
-        if new_id not in existing_ids:
-            return new_id
-
-def generate_mob_quest(quest_id, mob_name, rarity_range):
-    required_progress = random.randint(rarity_range[0], rarity_range[1])
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'item': {
-                'lore': [
-                    "&8  &7To complete this quest, you must",
-                    f"&8  &7kill &3{required_progress} {mob_name}&7.",
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8  &7EXP: &f{config['exp_multiplier']}",
-                    "&8  &7%total_progress%&7/&e%required_progress%",
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)',
-                ],
-                'material': 'STONE_SWORD',
-                'name': f'&e&lQUEST:&f {mob_name} Slayer'
-            },
-            'name': f'{mob_name} Hunter',
-            'points': config['points'],
-            'required-progress': required_progress,
-            'type': 'kill-mob',
-            'variable': mob_name
+# Difficulties from easiest to hardest, and the highest progress of each but the last
+DIFFICULTIES = sorted(QUEST_CONFIG, key=lambda difficulty: QUEST_CONFIG[difficulty]['progress_range'][0])
+DIFFICULTY_BOUNDS = [QUEST_CONFIG[difficulty]['progress_range'][1] for difficulty in DIFFICULTIES[:-1]]
+
+def assign_difficulties(progress):
+    """Map a batch of required progress values to indexes into DIFFICULTIES
+
+    Same bucketing as get_quest_difficulty, done with one searchsorted call
+    when NumPy is available.
+    """
+    numpy = load_numpy()
+    if numpy is not None:
+        return numpy.searchsorted(DIFFICULTY_BOUNDS, progress).tolist()
+    return [bisect_left(DIFFICULTY_BOUNDS, value) for value in progress]
+
+def draw_progress_batch(seed, lows, highs):
+    """Draw one random integer in [low, high] for every (low, high) pair in one call"""
+    numpy = load_numpy()
+    if numpy is not None:
+        rng = numpy.random.default_rng(seed)
+        return rng.integers(numpy.asarray(lows), numpy.asarray(highs), endpoint=True).tolist()
+    rng = random.Random(seed)
+    return [rng.randint(low, high) for low, high in zip(lows, highs)]
+
+class CatalogWarning(UserWarning):
+    """A catalog entry that was skipped or does not name a known material"""
+
+def catalog_names(data):
+    """Every entry name of a parsed catalog, whatever its shape
+
+    materials.yml lists one name per line without list markers, which YAML
+    reads as a single string of space separated names.
+    """
+    if isinstance(data, str):
+        return data.split()
+    if isinstance(data, dict):
+        return [name for entries in data.values() for name in catalog_names(entries)]
+    return [entry['name'] if isinstance(entry, dict) else entry for entry in data or ()]
+
+class MaterialIndex:
+    """Case-normalized index of the names in materials.yml
+
+    Names are keyed on their upper-case form, the spelling of
+    materials.yml, so material and duplicate checks are set lookups.
+    """
+
+    def __init__(self, materials=None):
+        # materials is a list of names, or None when there is no material list to check against
+        self.materials = None if materials is None else frozenset(map(self.normalize, materials))
+
+    @classmethod
+    def load(cls, list_dir=LIST_DIR, cache_dir=CACHE_DIR):
+        """Index the materials.yml of list_dir, if there is one"""
+        if not os.path.exists(os.path.join(list_dir, MATERIALS_CATALOG)):
+            return cls()
+        return cls(catalog_names(load_catalog(MATERIALS_CATALOG, list_dir, cache_dir)[0]))
+
+    @staticmethod
+    def normalize(name):
+        return str(name).upper()
+
+    def is_material(self, name):
+        """Whether name is a known material, in any case; always True without a material list"""
+        return self.materials is None or self.normalize(name) in self.materials
+
+# Number of the quest of a category without a catalog. The original script
+# counted a placeholder before it, and the plugin keeps progress by quest ID
+SINGLE_QUEST_NUMBER = 2
+
+_ID_NUMBER = re.compile(r'\d+$')
+
+def entry_key(name):
+    """Key of a catalog entry in the quest ID maps, '' for a category's single quest"""
+    return '' if name is None else name
+
+def quest_ids(quests):
+    """Map the catalog entry of every Quest record to its ID, as kept in the manifest"""
+    return {entry_key(quest.variable): quest.id for quest in quests}
+
+class QuestIdAllocator:
+    """Allocates unique quest IDs made of a prefix and a number
+
+    By default every prefix shares one counter, so the quests of a category
+    are numbered in generation order across its tiers (hard_1 to hard_13,
+    then rare_14 and so on), as the quest files always have been. With
+    per_prefix=True each prefix counts on its own. Numbering starts after
+    'start'. IDs in 'reserved' (for example the hand-written quest files)
+    are never handed out. Counters only move forward, so every allocation
+    is a constant-time set lookup instead of a rescan of the existing IDs.
+
+    'known' maps catalog entries to the IDs they had in the last run. An
+    entry keeps its ID while it is free and has the same prefix, and new
+    entries are numbered after every known ID, so adding or removing an
+    entry never renumbers the others.
+    """
+
+    def __init__(self, reserved=(), start=0, per_prefix=False, known=None):
+        self.reserved = reserved
+        self.known = known or {}
+        numbers = [int(match.group()) for match in map(_ID_NUMBER.search, self.known.values()) if match]
+        self.start = max([start] + numbers)
+        self.per_prefix = per_prefix
+        self.allocated = set()
+        self.counters = {}
+
+    def allocate(self, prefix='', entry=None):
+        """Return the known ID of a catalog entry if it is still free, else the next free ID for the prefix"""
+        quest_id = self.known.get(entry)
+        if (quest_id is not None and quest_id[:len(prefix)] == prefix and quest_id[len(prefix):].isdigit()
+                and quest_id not in self.reserved and quest_id not in self.allocated):
+            self.allocated.add(quest_id)
+            return quest_id
+        counter = prefix if self.per_prefix else ''
+        number = self.counters.get(counter, self.start)
+        while True:
+            number += 1
+            quest_id = f"{prefix}{number}"
+            if quest_id not in self.reserved and quest_id not in self.allocated:
+                break
+        self.counters[counter] = number
+        self.allocated.add(quest_id)
+        return quest_id
+
+# Rarity tiers as (rarity, id prefix, progress range), generated in this order
+MOB_RARITY_TIERS = [
+    ('hard', 'hard_', (1, 1)),        # 1 kill (boss/elite mobs)
+    ('rare', 'rare_', (4, 8)),        # 4-8 kills (moderate difficulty)
+    ('common', 'common_', (8, 16)),   # 8-16 kills (easily farmable)
+]
+BLOCK_RARITY_RANGES = {
+    'hard': (4, 8),     # extremely rare/valuable
+    'rare': (8, 16),    # moderate difficulty
+    'common': (16, 32), # easily obtainable
+}
+
+# Quests drawn from each rarity for a player's pass, see QuestGenerator.generate_player_pass
+PLAYER_PASS_RARITIES = {
+    'common': 5,
+    'rare': 3,
+    'hard': 2,
+}
+
+# Put before the tier prefix of every pass quest ID (pass_hard_1), so a pass
+# never reuses the ID of a different quest of the generated files
+PLAYER_PASS_PREFIX = 'pass_'
+
+def rarity_tiers(suffix):
+    """Rarity tiers for the block and food catalogs with the given ID suffix"""
+    return [(rarity, f'{rarity}_{suffix}_', progress_range)
+            for rarity, progress_range in BLOCK_RARITY_RANGES.items()]
+
+# Lore bullet used by each lore style
+LORE_BULLETS = {
+    'indent': '&8  &7',
+    'arrow': '&8 » &7',
+}
+
+# Quest types generated for every category. '{variable}' is replaced by the
+# catalog entry and '{progress}' by the required progress. Categories with a
+# 'catalog' get one quest per entry, either split by 'tiers' or with a fixed
+# 'prefix' and 'progress_range'. Categories without one get a single quest.
+QUEST_TYPES = {
+    'mobs': {
+        'type': 'kill-mob',
+        'name': '{variable} Hunter',
+        'item_name': '{variable} Slayer',
+        'material': 'STONE_SWORD',
+        'objective': 'kill &3{progress} {variable}&7.',
+        'lore_style': 'indent',
+        'catalog': 'mobs_by_rarity.yml',
+        'tiers': MOB_RARITY_TIERS,
+    },
+    'mining': {
+        'type': 'block-break',
+        'name': '{variable} Miner',
+        'item_name': '{variable} Miner',
+        'material': '{variable}',
+        'objective': 'Mine &3{progress} {variable}&7.',
+        'lore_style': 'indent',
+        'anti_abuse': True,
+        'catalog': 'blocks_by_rarity.yml',
+        'tiers': rarity_tiers('mine'),
+    },
+    'building': {
+        'type': 'block-place',
+        'name': '{variable} Builder',
+        'item_name': '{variable} Builder',
+        'material': '{variable}',
+        'objective': 'Place &3{progress} {variable}&7.',
+        'lore_style': 'indent',
+        'anti_abuse': True,
+        'catalog': 'blocks_by_rarity.yml',
+        'tiers': rarity_tiers('place'),
+    },
+    'foods': {
+        'type': 'consume',
+        'name': '{variable} Consumer',
+        'item_name': '{variable} Consumer',
+        'material': '{variable}',
+        'objective': 'Eat &3{progress} {variable}&7.',
+        'lore_style': 'arrow',
+        'catalog': 'food_by_rarity.yml',
+        'tiers': rarity_tiers('food'),
+    },
+    'smelting': {
+        'type': 'smelt',
+        'name': '{variable} Smelter',
+        'item_name': '{variable} Smelter',
+        'material': '{variable}',
+        'objective': 'Smelt items to create &3{progress} {variable}&7.',
+        'lore_style': 'arrow',
+        'catalog': 'smeltable.yml',
+        'prefix': 'smelt_',
+        'progress_range': (16, 40),
+    },
+    'taming': {
+        'type': 'tame',
+        'name': '{variable} Tamer',
+        'item_name': '{variable} Tamer',
+        'material': 'LEAD',
+        'objective': 'Tame &3{progress} {variable}&7.',
+        'lore_style': 'arrow',
+        'catalog': 'tamable.yml',
+        'prefix': 'tame_',
+        'progress_range': (3, 8),  # Reduced for taming
+    },
+    'riding': {
+        'type': 'ride-mob',
+        'name': '{variable} Rider',
+        'item_name': '{variable} Rider',
+        'material': 'SADDLE',
+        'objective': 'Ride a {variable} for &3{progress} blocks&7.',
+        'lore_style': 'arrow',
+        'catalog': 'rideable.yml',
+        'prefix': 'ride_',
+        'progress_range': (100, 500),  # Distance in blocks
+    },
+    'shearing': {
+        'type': 'shear',
+        'name': 'Sheep Shearer',
+        'material': 'SHEARS',
+        'objective': 'Shear &3{progress} sheep&7.',
+        'lore_style': 'arrow',
+        'prefix': 'shear_',
+        'progress_range': (10, 30),
+    },
+    'milk': {
+        'type': 'milk',
+        'name': 'Cow Milker',
+        'material': 'BUCKET',
+        'objective': 'Milk &3{progress} cows&7.',
+        'lore_style': 'arrow',
+        'prefix': 'milk_',
+        'progress_range': (10, 30),
+    },
+    'move': {
+        'type': 'move',
+        'name': 'Adventurous Traveller',
+        'material': 'COMPASS',
+        'objective': 'Move a distance of &3{progress} blocks&7.',
+        'lore_style': 'arrow',
+        'prefix': 'move_',
+        'progress_range': (1000, 3000),  # Reduced from 5000
+    },
+    'swim': {
+        'type': 'swim',
+        'name': 'Water Explorer',
+        'material': 'WATER_BUCKET',
+        'objective': 'Swim a distance of &3{progress} blocks&7.',
+        'lore_style': 'arrow',
+        'prefix': 'swim_',
+        'progress_range': (300, 1000),  # Reduced from 2000
+    },
+    'sprint': {
+        'type': 'sprint',
+        'name': 'Speed Demon',
+        'material': 'SUGAR',
+        'objective': 'Sprint a distance of &3{progress} blocks&7.',
+        'lore_style': 'arrow',
+        'prefix': 'sprint_',
+        'progress_range': (100, 300),  # Reduced from 500
+    },
+    'sneak': {
+        'type': 'sneak',
+        'name': 'Stealthy Ninja',
+        'material': 'LEATHER_BOOTS',
+        'objective': 'Sneak for &3{progress} seconds&7.',
+        'lore_style': 'arrow',
+        'prefix': 'sneak_',
+        'progress_range': (300, 1000),  # Reduced from 2000
+    },
+    'glide': {
+        'type': 'glide',
+        'name': 'Sky Diver',
+        'material': 'ELYTRA',
+        'objective': 'Glide a distance of &3{progress} blocks&7.',
+        'lore_style': 'arrow',
+        'prefix': 'glide_',
+        'progress_range': (300, 1000),  # Reduced from 2000
+    },
+    'fly': {
+        'type': 'fly',
+        'name': 'Aviator',
+        'material': 'FEATHER',
+        'objective': 'Fly a distance of &3{progress} blocks&7.',
+        'lore_style': 'arrow',
+        'prefix': 'fly_',
+        'progress_range': (500, 2000),  # Reduced from 5000
+    },
+    'gain_experience': {
+        'type': 'gain-experience',
+        'name': 'Experience Hunter',
+        'material': 'EXPERIENCE_BOTTLE',
+        'objective': 'Gain a total of &3{progress} experience points&7.',
+        'lore_style': 'arrow',
+        'prefix': 'exp_',
+        'progress_range': (500, 2000),  # Reduced from 5000
+    },
+}
+
+class QuestTemplate:
+    """A quest type compiled into its constant parts and per-quest slots
+
+    The quest, item and lore skeletons are built once per variable and the
+    EXP line and points once per difficulty, so rendering a quest only
+    copies the skeletons and fills in the progress slots.
+    """
+
+    def __init__(self, spec):
+        bullet = LORE_BULLETS[spec['lore_style']]
+        self.type = spec['type']
+        self._spec = spec
+        self._objective = bullet + spec['objective']
+        self._lore = [
+            f'{bullet}To complete this quest, you must',
+            None,  # objective, filled in per quest
+            '',
+            '&e&lINFORMATION',
+            None,  # EXP multiplier, filled in per quest
+            f'{bullet}%total_progress%&7/&e%required_progress%',
+            '',
+            '%progress_bar% &7(&a%percentage_progress%&7)',
+        ]
+        self._difficulties = {
+            difficulty: (config['points'], f"{bullet}EXP: &f{config['exp_multiplier']}")
+            for difficulty, config in QUEST_CONFIG.items()
         }
-    }
-    return quest
-
-def generate_mining_quest(quest_id, block_name, rarity_range=(16, 40)):
-    required_progress = random.randint(rarity_range[0], rarity_range[1])
-    config = get_quest_config(required_progress)
-
-    quest = {
-        quest_id: {
-            'anti-abuse': True,
-            'item': {
-                'lore': [
-                    "&8  &7To complete this quest, you must",
-                    f"&8  &7Mine &3{required_progress} {block_name}&7.",
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8  &7EXP: &f{config['exp_multiplier']}",
-                    "&8  &7%total_progress%&7/&e%required_progress%",
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)',
-                ],
-                'material': block_name,
-                'name': f'&e&lQUEST:&f {block_name} Miner'
-            },
-            'name': f'{block_name} Miner',
-            'points': config['points'],
-            'required-progress': required_progress,
-            'type': 'block-break',
-            'variable': block_name
+        self._difficulty_list = [self._difficulties[difficulty] for difficulty in DIFFICULTIES]
+        self._variables = {}
+
+    def _compile(self, variable):
+        spec = self._spec
+        quest = {'type': self.type, 'name': spec['name'].format(variable=variable)}
+        if 'catalog' in spec:
+            quest['variable'] = variable
+        if spec.get('anti_abuse'):
+            quest['anti-abuse'] = True
+        item_name = spec.get('item_name', spec['name']).format(variable=variable)
+        item = {
+            'name': f'&e&lQUEST:&f {item_name}',
+            'material': spec['material'].format(variable=variable),
         }
-    }
-    return quest
-
-def generate_placing_quest(quest_id, block_name, rarity_range=(16, 40)):
-    required_progress = random.randint(rarity_range[0], rarity_range[1])
-    config = get_quest_config(required_progress)
-
-    quest = {
-        quest_id: {
-            'anti-abuse': True,
-            'item': {
-                'lore': [
-                    "&8  &7To complete this quest, you must",
-                    f"&8  &7Place &3{required_progress} {block_name}&7.",
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8  &7EXP: &f{config['exp_multiplier']}",
-                    "&8  &7%total_progress%&7/&e%required_progress%",
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)',
-                ],
-                'material': block_name,
-                'name': f'&e&lQUEST:&f {block_name} Builder'
+        before, after = self._objective.replace('{variable}', str(variable)).split('{progress}')
+        compiled = self._variables[variable] = (quest, item, before, after)
+        return compiled
+
+    def render(self, variable, required_progress, difficulty=None):
+        """Build the quest dict for the given variable and required progress
+
+        'difficulty' is an index into DIFFICULTIES when it is already known,
+        for example from assign_difficulties.
+        """
+        quest_base, item_base, before, after = self._variables.get(variable) or self._compile(variable)
+        if difficulty is None:
+            points, exp_line = self._difficulties[get_quest_difficulty(required_progress)]
+        else:
+            points, exp_line = self._difficulty_list[difficulty]
+        lore = self._lore.copy()
+        lore[1] = f'{before}{required_progress}{after}'
+        lore[4] = exp_line
+        item = item_base.copy()
+        item['lore'] = lore
+        quest = quest_base.copy()
+        quest['item'] = item
+        quest['required-progress'] = required_progress
+        quest['points'] = points
+        return quest
+
+# Quest categories in the order they are merged into extra.yml.
+# Each category is saved to Quests/<category>.yml
+CATEGORIES = list(QUEST_TYPES)
+
+# Compiled template for every category
+QUEST_TEMPLATES = {category: QuestTemplate(spec) for category, spec in QUEST_TYPES.items()}
+
+class Quest:
+    """A generated quest, holding only the fields that vary between quests
+
+    The plugin dict with its name, material and lore is rendered from the
+    category's template by to_dict() when the quest is serialized.
+    """
+
+    __slots__ = ('id', 'category', 'variable', 'progress', 'tier')
+
+    def __init__(self, quest_id, category, variable, progress, tier=None):
+        self.id = quest_id
+        self.category = category
+        self.variable = variable
+        self.progress = progress
+        # Index into DIFFICULTIES
+        self.tier = bisect_left(DIFFICULTY_BOUNDS, progress) if tier is None else tier
+
+    @property
+    def type(self):
+        return QUEST_TEMPLATES[self.category].type
+
+    @property
+    def difficulty(self):
+        return DIFFICULTIES[self.tier]
+
+    @property
+    def points(self):
+        return QUEST_CONFIG[DIFFICULTIES[self.tier]]['points']
+
+    def to_dict(self):
+        """Render the quest as the dict written to the quest files"""
+        return QUEST_TEMPLATES[self.category].render(self.variable, self.progress, self.tier)
+
+    def __repr__(self):
+        return f'Quest({self.id!r}, {self.category!r}, {self.variable!r}, {self.progress!r})'
+
+class QuestPool:
+    """Quest records of several categories, each kept sorted by ID
+
+    extra() is a merged view over the same records, so the combined pool
+    never holds a second copy of any quest.
+    """
+
+    def __init__(self, quests_by_category=None):
+        self.categories = {}
+        for category, quests in (quests_by_category or {}).items():
+            self.add(category, quests)
+
+    def add(self, category, quests):
+        self.categories[category] = sorted(quests, key=attrgetter('id'))
+
+    def __len__(self):
+        return sum(len(quests) for quests in self.categories.values())
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def __getitem__(self, category):
+        return self.categories[category]
+
+    def extra(self):
+        """Iterate over the quests of every category in ID order"""
+        return heapq.merge(*self.categories.values(), key=attrgetter('id'))
+
+    def to_dict(self, category=None):
+        """Render a category, or every quest when category is None, as ID -> quest dict"""
+        quests = self.categories[category] if category is not None else self.extra()
+        return {quest.id: quest.to_dict() for quest in quests}
+
+def new_seed():
+    """Pick a random seed for a run that was not given one"""
+    return random.randrange(2 ** 32)
+
+class QuestRandom:
+    """Random stream for a single (category, item) key of a seeded run
+
+    Every draw hashes the seed, key and a draw counter, so the values of a
+    quest only depend on its own key. Adding or removing a catalog entry
+    leaves the progress of every other quest unchanged.
+    """
+
+    __slots__ = ('_key', '_draws')
+
+    def __init__(self, seed, *key):
+        self._key = ':'.join(str(part) for part in (seed,) + key).encode()
+        self._draws = 0
+
+    def randint(self, low, high):
+        """Return a random integer N such that low <= N <= high"""
+        self._draws += 1
+        digest = blake2b(self._key, digest_size=8, salt=self._draws.to_bytes(16, 'little')).digest()
+        return low + int.from_bytes(digest, 'little') % (high - low + 1)
+
+def seed_int(seed, *key):
+    """64-bit integer seed for a key of a run, for generators that need an integer"""
+    key = ':'.join(str(part) for part in (seed,) + key).encode()
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), 'little')
+
+def load_reserved_ids(quests_dir=QUESTS_DIR, cache_dir=CACHE_DIR):
+    """Collect the IDs of quest files in Quests/ and Quests/events/ not written by the generator"""
+    generated_files = {f'{category}.yml' for category in CATEGORIES}
+    generated_files.add('extra.yml')
+    reserved = set()
+    if os.path.isdir(quests_dir):
+        for filename in os.listdir(quests_dir):
+            if filename.endswith('.yml') and filename not in generated_files:
+                reserved.update(load_yaml_file(filename, quests_dir, cache_dir) or {})
+    events_dir = os.path.join(quests_dir, 'events')
+    if os.path.isdir(events_dir):
+        for filename in os.listdir(events_dir):
+            if filename.endswith('.yml'):
+                reserved.update((load_yaml_file(filename, events_dir, cache_dir) or {}).get('quests') or {})
+    return frozenset(str(quest_id) for quest_id in reserved)
+
+class GenerationHooks:
+    """Instrumentation hooks of a generator run, all no-ops by default
+
+    Pass a subclass to QuestGenerator(hooks=...) to observe the stages of a
+    run, the quests generated per category and the files written.
+    """
+
+    def stage(self, name):
+        """Context manager wrapped around every call of a stage"""
+        return nullcontext()
+
+    def quests_generated(self, category, type_counts):
+        """Called with the number of quests of each type generated for a category"""
+
+    def file_written(self, filename, size, changed):
+        """Called for every output file with its size; 'changed' is False when it was left alone"""
+
+class GenerationProfiler(GenerationHooks):
+    """Records timings and allocations per stage, quest counts and bytes written
+
+    Allocations are measured with tracemalloc, which is started when the
+    profiler is created with trace_memory=True and stopped by close().
+    """
+
+    def __init__(self, trace_memory=True):
+        self.stages = {}
+        self.quests = {}
+        self.files = {}
+        self.trace_memory = trace_memory
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0, 'allocated_bytes': 0, 'peak_bytes': 0})
+            stats['seconds'] += time.perf_counter() - start
+            stats['calls'] += 1
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                stats['allocated_bytes'] += max(current - start_memory, 0)
+                stats['peak_bytes'] = max(stats['peak_bytes'], peak - start_memory)
+
+    def quests_generated(self, category, type_counts):
+        counts = self.quests.setdefault(category, {})
+        for quest_type, count in type_counts.items():
+            counts[quest_type] = counts.get(quest_type, 0) + count
+
+    def file_written(self, filename, size, changed):
+        self.files[filename] = {'bytes': size, 'written': changed}
+
+    def close(self):
+        """Stop tracemalloc if this profiler started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self):
+        """The recorded metrics as a JSON-serializable dict"""
+        return {
+            'stages': self.stages,
+            'quests': self.quests,
+            'files': self.files,
+            'fragment_cache': FRAGMENT_CACHE.info(),
+            'totals': {
+                'seconds': sum(stats['seconds'] for stats in self.stages.values()),
+                'quests': sum(sum(counts.values()) for counts in self.quests.values()),
+                'bytes_written': sum(info['bytes'] for info in self.files.values() if info['written']),
             },
-            'name': f'{block_name} Builder',
-            'points': config['points'],
-            'required-progress': required_progress,
-            'type': 'block-place',
-            'variable': block_name
-        }
-    }
-    return quest
-
-def generate_eating_quest(quest_id, food_name, rarity_range=(10, 30)):
-    required_progress = random.randint(rarity_range[0], rarity_range[1])
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'consume',
-            'name': f'{food_name} Consumer',
-            'variable': food_name,
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'material': food_name,
-                'name': f'&e&lQUEST:&f {food_name} Consumer',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Eat &3{required_progress} {food_name}&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_smelting_quest(quest_id, smeltable_item):
-    required_progress = random.randint(16, 40)
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'smelt',
-            'name': f'{smeltable_item} Smelter',
-            'variable': smeltable_item,
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': f'&e&lQUEST:&f {smeltable_item} Smelter',
-                'material': smeltable_item,
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Smelt items to create &3{required_progress} {smeltable_item}&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_taming_quest(quest_id, tamable_mob):
-    required_progress = random.randint(3, 8)  # Reduced for taming
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'tame',
-            'name': f'{tamable_mob} Tamer',
-            'variable': tamable_mob,
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': f'&e&lQUEST:&f {tamable_mob} Tamer',
-                'material': 'LEAD',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Tame &3{required_progress} {tamable_mob}&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_riding_quest(quest_id, rideable_mob):
-    required_progress = random.randint(100, 500)  # Distance in blocks
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'ride-mob',
-            'name': f'{rideable_mob} Rider',
-            'variable': rideable_mob,
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': f'&e&lQUEST:&f {rideable_mob} Rider',
-                'material': 'SADDLE',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Ride a {rideable_mob} for &3{required_progress} blocks&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_shearing_quest(quest_id):
-    required_progress = random.randint(10, 30)
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'shear',
-            'name': 'Sheep Shearer',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Sheep Shearer',
-                'material': 'SHEARS',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Shear &3{required_progress} sheep&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_milk_quest(quest_id):
-    required_progress = random.randint(10, 30)
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'milk',
-            'name': 'Cow Milker',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Cow Milker',
-                'material': 'BUCKET',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Milk &3{required_progress} cows&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_move_quest(quest_id):
-    required_progress = random.randint(1000, 3000)  # Reduced from 5000
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'move',
-            'name': 'Adventurous Traveller',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Adventurous Traveller',
-                'material': 'COMPASS',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Move a distance of &3{required_progress} blocks&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_swim_quest(quest_id):
-    required_progress = random.randint(300, 1000)  # Reduced from 2000
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'swim',
-            'name': 'Water Explorer',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Water Explorer',
-                'material': 'WATER_BUCKET',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Swim a distance of &3{required_progress} blocks&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
         }
-    }
-    return quest
-
-def generate_sprint_quest(quest_id):
-    required_progress = random.randint(100, 300)  # Reduced from 500
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'sprint',
-            'name': 'Speed Demon',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Speed Demon',
-                'material': 'SUGAR',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Sprint a distance of &3{required_progress} blocks&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_sneak_quest(quest_id):
-    required_progress = random.randint(300, 1000)  # Reduced from 2000
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'sneak',
-            'name': 'Stealthy Ninja',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Stealthy Ninja',
-                'material': 'LEATHER_BOOTS',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Sneak for &3{required_progress} seconds&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_glide_quest(quest_id):
-    required_progress = random.randint(300, 1000)  # Reduced from 2000
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'glide',
-            'name': 'Sky Diver',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Sky Diver',
-                'material': 'ELYTRA',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Glide a distance of &3{required_progress} blocks&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
-        }
-    }
-    return quest
-
-def generate_fly_quest(quest_id):
-    required_progress = random.randint(500, 2000)  # Reduced from 5000
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'fly',
-            'name': 'Aviator',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Aviator',
-                'material': 'FEATHER',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Fly a distance of &3{required_progress} blocks&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
-            }
+
+    def to_prometheus(self, prefix='battlepass_generator'):
+        """The recorded metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f'{prefix}_{name}{{{label_text}}} {value}')
+
+        metric('stage_seconds', 'gauge', 'Wall time spent in each stage of the last run.',
+               [({'stage': name}, f"{stats['seconds']:.6f}") for name, stats in self.stages.items()])
+        metric('stage_calls', 'gauge', 'Number of times each stage ran in the last run.',
+               [({'stage': name}, stats['calls']) for name, stats in self.stages.items()])
+        if self.trace_memory:
+            metric('stage_allocated_bytes', 'gauge', 'Memory still allocated after each stage of the last run.',
+                   [({'stage': name}, stats['allocated_bytes']) for name, stats in self.stages.items()])
+            metric('stage_peak_bytes', 'gauge', 'Peak memory allocated during a call of each stage.',
+                   [({'stage': name}, stats['peak_bytes']) for name, stats in self.stages.items()])
+        metric('quests', 'gauge', 'Quests generated per category and type in the last run.',
+               [({'category': category, 'type': quest_type}, count)
+                for category, counts in self.quests.items() for quest_type, count in counts.items()])
+        metric('file_bytes', 'gauge', 'Size of each output file of the last run.',
+               [({'file': filename}, info['bytes']) for filename, info in self.files.items()])
+        metric('file_written', 'gauge', '1 if the output file was rewritten in the last run, 0 if unchanged.',
+               [({'file': filename}, int(info['written'])) for filename, info in self.files.items()])
+        cache = FRAGMENT_CACHE.info()
+        metric('fragment_cache_requests', 'counter', 'Serialized quest bodies served from or added to the cache.',
+               [({'result': 'hit'}, cache['hits']), ({'result': 'miss'}, cache['misses'])])
+        metric('fragment_cache_entries', 'gauge', 'Serialized quest bodies held in the cache.', [({}, cache['size'])])
+        return '\n'.join(lines) + '\n'
+
+class QuestGenerator:
+    """Loads the quest catalogs once and generates quest categories on demand
+
+    A catalog is loaded the first time one of its categories is used, so
+    generating a few categories only reads the List/ files they need.
+    """
+
+    def __init__(self, list_dir=LIST_DIR, quests_dir=QUESTS_DIR, cache_dir=CACHE_DIR, vectorized=False,
+                 hooks=None, strict_materials=False):
+        self.vectorized = vectorized
+        self.hooks = hooks or GenerationHooks()
+        self.catalogs = {}
+        self.catalog_details = {}
+        self.catalog_digests = {}
+        self.list_dir, self.cache_dir = list_dir, cache_dir
+        with self.hooks.stage('load'):
+            self.reserved_ids = load_reserved_ids(quests_dir, cache_dir)
+        self.strict_materials = strict_materials
+        self._materials = None
+        self._groups = {}
+        self._checked = set()
+        self._player_pools = None
+        self._batch_plans = {}
+
+    def load_catalogs(self, categories=CATEGORIES):
+        """Load the List/ catalogs of the given categories that are not loaded yet"""
+        filenames = []
+        for category in categories:
+            if category not in QUEST_TYPES:
+                raise ValueError(f"Unknown quest category: {category}")
+            filename = QUEST_TYPES[category].get('catalog')
+            if filename and filename not in self.catalogs and filename not in filenames:
+                filenames.append(filename)
+        if filenames:
+            with self.hooks.stage('load'):
+                for filename in filenames:
+                    data, self.catalog_digests[filename] = load_catalog(filename, self.list_dir, self.cache_dir)
+                    self.catalogs[filename], self.catalog_details[filename] = parse_catalog(data)
+
+    def category_key(self, category, seed):
+        """Hash of everything the quests of a category are generated from"""
+        self.load_catalogs([category])
+        spec = QUEST_TYPES[category]
+        inputs = {
+            'seed': str(seed),
+            'template_version': TEMPLATE_VERSION,
+            'quest_config': QUEST_CONFIG,
+            'spec': spec,
+            'catalog': self.catalog_digests.get(spec.get('catalog')),
+            'reserved_ids': sorted(self.reserved_ids),
+            # NumPy and the pure Python fallback draw different values
+            'vectorized': self.vectorized and ('numpy' if load_numpy() is not None else 'python'),
         }
-    }
-    return quest
-
-def generate_gain_experience_quest(quest_id):
-    required_progress = random.randint(500, 2000)  # Reduced from 5000
-    config = get_quest_config(required_progress)
-    
-    quest = {
-        quest_id: {
-            'type': 'gain-experience',
-            'name': 'Experience Hunter',
-            'required-progress': required_progress,
-            'points': config['points'],
-            'item': {
-                'name': '&e&lQUEST:&f Experience Hunter',
-                'material': 'EXPERIENCE_BOTTLE',
-                'lore': [
-                    '&8 » &7To complete this quest, you must',
-                    f'&8 » &7Gain a total of &3{required_progress} experience points&7.',
-                    '',
-                    '&e&lINFORMATION',
-                    f"&8 » &7EXP: &f{config['exp_multiplier']}",
-                    '&8 » &7%total_progress%&7/&e%required_progress%',
-                    '',
-                    '%progress_bar% &7(&a%percentage_progress%&7)'
-                ]
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def generate(self, category, seed=None):
+        """Generate the quests of a single category as a dict of quest ID -> quest dict
+
+        The same seed always gives the same quests, and each quest draws from
+        its own (category, item) stream of that seed. A vectorized generator
+        uses generate_batch instead.
+        """
+        return {quest.id: quest.to_dict() for quest in self.generate_records(category, seed)}
+
+    def generate_records(self, category, seed=None, known_ids=None):
+        """Generate the quests of a single category as a list of Quest records
+
+        known_ids maps catalog entries to the IDs they had in an earlier run
+        (see quest_ids), which they keep; without it the quests are numbered
+        in catalog order.
+        """
+        if seed is None:
+            seed = new_seed()
+        if self.vectorized:
+            return self._generate_batch(category, seed, known_ids)
+        return self._generate(category, seed, self._id_allocator(category, known_ids))
+
+    def generate_batch(self, category, seed=None):
+        """Generate a category drawing every progress value in one vectorized call
+
+        Much faster for large catalogs, but the whole category shares one
+        stream of the seed, so editing a catalog entry can change the progress
+        of the entries after it. Falls back to pure Python without NumPy,
+        which draws different values for the same seed.
+        """
+        if seed is None:
+            seed = new_seed()
+        return {quest.id: quest.to_dict() for quest in self._generate_batch(category, seed)}
+
+    def generate_all(self, seed=None):
+        """Generate every category, returning a dict of category -> quests"""
+        if seed is None:
+            seed = new_seed()
+        return {category: self.generate(category, seed) for category in CATEGORIES}
+
+    def generate_pool(self, seed=None, categories=CATEGORIES):
+        """Generate the given categories as a QuestPool of Quest records"""
+        if seed is None:
+            seed = new_seed()
+        return QuestPool({category: self.generate_records(category, seed) for category in categories})
+
+    def run(self, seed=None, quests_dir=QUESTS_DIR, jobs=1, incremental=False, fsync='none',
+            shard_size=None, shards_dir=SHARDS_DIR, exports=(), exports_dir=EXPORTS_DIR, categories=None):
+        """Generate every category, or the given categories, and save the quest files
+
+        With jobs > 1 the categories are generated and written by a pool of
+        worker processes. Quests are drawn from per-item streams of the seed,
+        so the output does not depend on how the categories are scheduled.
+
+        With incremental=True only the categories whose catalog, config or
+        output file changed since the last run are regenerated, and the seed
+        of the last run is reused unless another one is given.
+
+        The manifest keeps the ID of every catalog entry, and entries keep it
+        in later runs, so editing a catalog only adds or removes the quests
+        of the entries that were edited.
+
+        Every file is replaced atomically, so a server reloading the quests
+        never reads a partially written file. fsync is one of FSYNC_MODES.
+
+        With a shard_size, the quests of every category are also written to
+        shards of at most that many bytes in shards_dir (see save_shards).
+        Each of the EXPORT_FORMATS named in exports writes a copy of the
+        quest files to exports_dir (see save_exports), dumped from the same
+        records as the YAML, or read back from the files of the categories
+        that were not regenerated.
+
+        With a list of categories only those are regenerated, and only their
+        catalogs are loaded. The other category files are kept and merged
+        into extra.yml as they are, and the seed of the last run is reused
+        unless another one is given. Returns the seed used.
+        """
+        manifest = load_manifest(quests_dir)
+        if seed is None:
+            reuse_seed = incremental or categories is not None
+            seed = manifest['seed'] if reuse_seed and 'seed' in manifest else new_seed()
+        # Create 'Quests' folder if it doesn't exist
+        os.makedirs(quests_dir, exist_ok=True)
+
+        if categories is not None:
+            self.load_catalogs(categories)  # reports unknown categories
+        # extra.yml is merged from every category file, so missing ones are generated too
+        selected = [
+            category for category in CATEGORIES
+            if categories is None or category in categories
+            or not os.path.exists(os.path.join(quests_dir, f'{category}.yml'))
+        ]
+        keys = {category: self.category_key(category, seed) for category in selected}
+        outputs = manifest.get('outputs', {})
+        stale = [
+            category for category in selected
+            if not incremental
+            or manifest.get('categories', {}).get(category) != keys[category]
+            or file_digest(os.path.join(quests_dir, f'{category}.yml')) != outputs.get(f'{category}.yml')
+        ]
+
+        hooks = self.hooks
+        # Options are checked before anything is written
+        for name in exports:
+            export_format(name)
+        if shard_size is not None and shard_size < 1:
+            raise ValueError(f"The shard size must be at least 1 byte, not {shard_size}")
+        # Check the catalogs here, so problems are reported once and before any file is written
+        for category in stale:
+            self._category_groups(category)
+        new_outputs = {f'{category}.yml': outputs.get(f'{category}.yml') for category in CATEGORIES}
+        # Catalog entry -> quest ID of every category, so entries keep their IDs across runs
+        known_ids = manifest.get('ids', {})
+        ids = {category: known_ids[category] for category in CATEGORIES if category in known_ids}
+        fragments_by_file = {}
+        export_pool = QuestPool()
+        if jobs > 1 and len(stale) > 1:
+            # Workers write their own files, and only report quest counts and
+            # file sizes back, so the stages they run are timed as a whole.
+            # Each worker syncs its own file, as they rename it independently
+            worker_fsync = 'none' if fsync == 'none' else 'file'
+            from concurrent.futures import ProcessPoolExecutor  # multiprocessing is slow to import
+            with hooks.stage('workers'), ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                                             initargs=(self,)) as pool:
+                results = pool.map(_save_category_job, stale, [seed] * len(stale), [quests_dir] * len(stale),
+                                   [worker_fsync] * len(stale), [known_ids.get(category) for category in stale])
+                for category, (digest, type_counts, size, changed, category_ids) in zip(stale, results):
+                    new_outputs[f'{category}.yml'] = digest
+                    ids[category] = category_ids
+                    hooks.quests_generated(category, type_counts)
+                    hooks.file_written(f'{category}.yml', size, changed)
+        else:
+            for category in stale:
+                with hooks.stage('generate'):
+                    quests = self.generate_records(category, seed, known_ids.get(category))
+                ids[category] = quest_ids(quests)
+                hooks.quests_generated(category, Counter(quest.type for quest in quests))
+                with hooks.stage('serialize'):
+                    fragments_by_file[f'{category}.yml'] = serialize_quests(quests)
+                if exports:
+                    export_pool.add(category, quests)
+                del quests
+
+        def category_fragments(category):
+            # The fragments serialized above, or the file on disk for a category
+            # that was not regenerated
+            filename = f'{category}.yml'
+            if filename in fragments_by_file:
+                return fragments_by_file[filename]
+            return iter_quest_fragments(filename, quests_dir)
+
+        # extra.yml is merged from the fragments of every category
+        if stale or file_digest(os.path.join(quests_dir, 'extra.yml')) != outputs.get('extra.yml'):
+            with hooks.stage('extra'):
+                fragments_by_file['extra.yml'] = list(merge_extra(
+                    category_fragments(category) for category in CATEGORIES))
+        else:
+            new_outputs['extra.yml'] = outputs['extra.yml']
+
+        # Every file is written concurrently and renamed into place together
+        with hooks.stage('write'):
+            new_outputs.update(write_quest_files(fragments_by_file, quests_dir, hooks, fsync))
+
+        if shard_size is not None:
+            with hooks.stage('shards'):
+                save_shards({category: category_fragments(category) for category in CATEGORIES},
+                            shard_size, shards_dir, hooks, fsync)
+
+        if exports:
+            # Categories written by workers or not regenerated are exported
+            # from their files on disk, so the exports always match the YAML
+            with hooks.stage('export'):
+                export_quests = dict(export_pool.categories)
+                for category in CATEGORIES:
+                    if category not in export_quests:
+                        export_quests[category] = load_yaml_file(f'{category}.yml', quests_dir, None) or {}
+                save_exports(export_quests, exports, exports_dir, hooks, fsync)
+
+        with hooks.stage('manifest'):
+            save_manifest({
+                'seed': str(seed),
+                # A partial run keeps the entries of the categories it did not load
+                'inputs': self.catalog_digests if categories is None
+                          else {**manifest.get('inputs', {}), **self.catalog_digests},
+                'categories': keys if categories is None else {**manifest.get('categories', {}), **keys},
+                'outputs': new_outputs,
+                'ids': {category: ids[category] for category in CATEGORIES if category in ids},
+            }, quests_dir, fsync)
+        return seed
+
+    def generate_player_pass(self, player, seed):
+        """Generate a randomized pass for one player from the rarity catalogs
+
+        PLAYER_PASS_RARITIES sets how many quests are drawn from each rarity,
+        across every category that is split by rarity, without repeating a
+        (category, item) pair. Entries are drawn in proportion to their
+        catalog weight. The same player and seed always give the same pass.
+        Quest IDs start with PLAYER_PASS_PREFIX, so they never clash with the
+        IDs of the generated quest files.
+        """
+        return {quest.id: quest.to_dict() for quest in self.generate_player_pass_records(player, seed)}
+
+    def generate_player_pass_records(self, player, seed):
+        """Generate a player's pass as a list of Quest records"""
+        pools = self._player_pass_pools()
+        rng = QuestRandom(seed, 'player', player)
+        ids = QuestIdAllocator(self.reserved_ids, per_prefix=True)
+        quests = []
+        for rarity, count in PLAYER_PASS_RARITIES.items():
+            pool, table = pools.get(rarity, ((), None))
+            picked = set()
+            while len(picked) < min(count, len(pool)):
+                index = table.draw(rng)
+                if index in picked:
+                    continue
+                picked.add(index)
+                category, name, prefix, (low, high) = pool[index]
+                quests.append(Quest(ids.allocate(PLAYER_PASS_PREFIX + prefix), category, name,
+                                    rng.randint(low, high)))
+        return quests
+
+    def iter_player_passes(self, players, seed, records=False):
+        """Lazily yield (player, quests) for every player name in an iterable
+
+        quests is a dict of quest ID -> quest dict, or a list of Quest
+        records with records=True.
+        """
+        generate = self.generate_player_pass_records if records else self.generate_player_pass
+        for player in players:
+            player = player.strip()
+            if player:
+                yield player, generate(player, seed)
+
+    def warm(self):
+        """Load every catalog and the player pass pools ahead of the first request
+
+        Copies of a warm generator, such as the ones sent to worker
+        processes, start with nothing left to load.
+        """
+        self.load_catalogs()
+        self._player_pass_pools()
+
+    def category_entries(self, category, rarity=None):
+        """(catalog entry, progress range) of every entry of a category in generation order
+
+        rarity limits the entries to one tier of a category split by rarity.
+        Entries of a category without a catalog are None.
+        """
+        groups = self._category_groups(category)
+        if rarity is not None:
+            rarities = [tier_rarity for tier_rarity, _, _ in QUEST_TYPES[category].get('tiers', ())]
+            if rarity not in rarities:
+                raise ValueError(f"Category {category} has no rarity {rarity!r}")
+            groups = [groups[rarities.index(rarity)]]
+        return [
+            (name, entry_range)
+            for names, _, progress_range in groups
+            for name, entry_range in zip(names, self._progress_ranges(category, names, progress_range))
+        ]
+
+    def _player_pass_pools(self):
+        # Candidate (category, item, ID prefix, progress range) and the alias
+        # table of their weights for each rarity; entries of weight 0 are left out
+        if self._player_pools is None:
+            self.load_catalogs([category for category, spec in QUEST_TYPES.items() if 'tiers' in spec])
+            pools = {}
+            for category, spec in QUEST_TYPES.items():
+                if 'tiers' not in spec:
+                    continue
+                details = self.catalog_details.get(spec['catalog'], {})
+                for (rarity, _, _), (names, prefix, progress_range) in zip(spec['tiers'],
+                                                                           self._category_groups(category)):
+                    candidates, weights = pools.setdefault(rarity, ([], []))
+                    for name in names:
+                        weight, progress = details.get(name, (1, None))
+                        if weight > 0:
+                            candidates.append((category, name, prefix, progress or progress_range))
+                            weights.append(weight)
+            self._player_pools = {
+                rarity: (candidates, AliasTable(weights))
+                for rarity, (candidates, weights) in pools.items() if candidates
             }
-        }
-    }
-    return quest
-
-# Generate quests using simplified rarity system
-generated_mob_quests = {}
-
-# Hard rarity mobs: 1 kill (boss/elite mobs)
-for mob_name in mobs_by_rarity_data['hard']:
-    quest_id = generate_quest_id(generated_mob_quests, 'hard_')
-    generated_mob_quests.update(generate_mob_quest(quest_id, mob_name, (1, 1)))
-
-# Rare rarity mobs: 4-8 kills (moderate difficulty)
-for mob_name in mobs_by_rarity_data['rare']:
-    quest_id = generate_quest_id(generated_mob_quests, 'rare_')
-    generated_mob_quests.update(generate_mob_quest(quest_id, mob_name, (4, 8)))
-
-# Common rarity mobs: 8-16 kills (easily farmable)
-for mob_name in mobs_by_rarity_data['common']:
-    quest_id = generate_quest_id(generated_mob_quests, 'common_')
-    generated_mob_quests.update(generate_mob_quest(quest_id, mob_name, (8, 16)))
-
-# Generate quests using rarity-based blocks system
-generated_mining_quests = {}
-
-# Hard rarity blocks: 4-8 mining (extremely rare/valuable)
-for block_name in blocks_by_rarity_data['hard']:
-    quest_id = generate_quest_id(generated_mining_quests, 'hard_mine_')
-    generated_mining_quests.update(generate_mining_quest(quest_id, block_name, (4, 8)))
-
-# Rare rarity blocks: 8-16 mining (moderate difficulty)
-for block_name in blocks_by_rarity_data['rare']:
-    quest_id = generate_quest_id(generated_mining_quests, 'rare_mine_')
-    generated_mining_quests.update(generate_mining_quest(quest_id, block_name, (8, 16)))
-
-# Common rarity blocks: 16-32 mining (easily obtainable)
-for block_name in blocks_by_rarity_data['common']:
-    quest_id = generate_quest_id(generated_mining_quests, 'common_mine_')
-    generated_mining_quests.update(generate_mining_quest(quest_id, block_name, (16, 32)))
-
-# Generate quests using rarity-based blocks system for placing
-generated_placing_quests = {}
-
-# Hard rarity blocks: 4-8 placing (extremely rare/valuable)
-for block_name in blocks_by_rarity_data['hard']:
-    quest_id = generate_quest_id(generated_placing_quests, 'hard_place_')
-    generated_placing_quests.update(generate_placing_quest(quest_id, block_name, (4, 8)))
-
-# Rare rarity blocks: 8-16 placing (moderate difficulty)
-for block_name in blocks_by_rarity_data['rare']:
-    quest_id = generate_quest_id(generated_placing_quests, 'rare_place_')
-    generated_placing_quests.update(generate_placing_quest(quest_id, block_name, (8, 16)))
-
-# Common rarity blocks: 16-32 placing (easily obtainable)
-for block_name in blocks_by_rarity_data['common']:
-    quest_id = generate_quest_id(generated_placing_quests, 'common_place_')
-    generated_placing_quests.update(generate_placing_quest(quest_id, block_name, (16, 32)))
-
-# Generate quests using rarity-based food system
-generated_food_quests = {}
-
-# Hard rarity foods: 4-8 consumption (extremely rare/valuable)
-for food_name in food_by_rarity_data['hard']:
-    quest_id = generate_quest_id(generated_food_quests, 'hard_food_')
-    generated_food_quests.update(generate_eating_quest(quest_id, food_name, (4, 8)))
-
-# Rare rarity foods: 8-16 consumption (moderate difficulty)
-for food_name in food_by_rarity_data['rare']:
-    quest_id = generate_quest_id(generated_food_quests, 'rare_food_')
-    generated_food_quests.update(generate_eating_quest(quest_id, food_name, (8, 16)))
-
-# Common rarity foods: 16-32 consumption (easily obtainable)
-for food_name in food_by_rarity_data['common']:
-    quest_id = generate_quest_id(generated_food_quests, 'common_food_')
-    generated_food_quests.update(generate_eating_quest(quest_id, food_name, (16, 32)))
-
-# Generate quests using smeltable item names
-generated_smelting_quests = {}
-for smeltable_item in smeltable_data:
-    quest_id = generate_quest_id(generated_smelting_quests, 'smelt_')
-    generated_smelting_quests.update(generate_smelting_quest(quest_id, smeltable_item))
-
-# Generate quests using tamable mobs names
-generated_taming_quests = {}
-for tamable_mob in tamable_data:
-    quest_id = generate_quest_id(generated_taming_quests, 'tame_')
-    generated_taming_quests.update(generate_taming_quest(quest_id, tamable_mob))
-
-# Generate quests using rideable mobs names
-generated_riding_quests = {}
-for rideable_mob in rideable_data:
-    quest_id = generate_quest_id(generated_riding_quests, 'ride_')
-    generated_riding_quests.update(generate_riding_quest(quest_id, rideable_mob))
-
-# Generate single instance quests
-generated_shearing_quests = {generate_quest_id(['1'], 'shear_'): generate_shearing_quest('1')['1']}
-generated_milk_quests = {generate_quest_id(['1'], 'milk_'): generate_milk_quest('1')['1']}
-generated_move_quests = {generate_quest_id(['1'], 'move_'): generate_move_quest('1')['1']}
-generated_swim_quests = {generate_quest_id(['1'], 'swim_'): generate_swim_quest('1')['1']}
-generated_sprint_quests = {generate_quest_id(['1'], 'sprint_'): generate_sprint_quest('1')['1']}
-generated_sneak_quests = {generate_quest_id(['1'], 'sneak_'): generate_sneak_quest('1')['1']}
-generated_glide_quests = {generate_quest_id(['1'], 'glide_'): generate_glide_quest('1')['1']}
-generated_fly_quests = {generate_quest_id(['1'], 'fly_'): generate_fly_quest('1')['1']}
-generated_gain_experience_quests = {generate_quest_id(['1'], 'exp_'): generate_gain_experience_quest('1')['1']}
-
-# Create 'Quests' folder if it doesn't exist
-os.makedirs('Quests', exist_ok=True)
+        return self._player_pools
+
+    def _progress_ranges(self, category, names, progress_range):
+        # Progress range of every entry, where catalog entries can replace the category's
+        details = self.catalog_details.get(QUEST_TYPES[category].get('catalog'), {})
+        if not details:
+            return [progress_range] * len(names)
+        return [details.get(name, (1, None))[1] or progress_range for name in names]
+
+    @property
+    def materials(self):
+        """MaterialIndex of materials.yml for the material checks, loaded on first use"""
+        if self._materials is None:
+            self._materials = MaterialIndex.load(self.list_dir, self.cache_dir)
+        return self._materials
+
+    def check_materials(self, category):
+        """Item materials of a category that are not in materials.yml, as {entry: material}"""
+        spec = QUEST_TYPES[category]
+        unknown = {}
+        for names, _, _ in self._category_groups(category, check=False):
+            for name in names:
+                material = spec['material'].format(variable=name)
+                if not self.materials.is_material(material):
+                    unknown[name] = material
+        return unknown
+
+    def _category_groups(self, category, check=True):
+        # (catalog entries, ID prefix, progress range) in generation order.
+        # Entries repeated in another case are dropped, and the materials are
+        # checked the first time a category is used
+        groups = self._groups.get(category)
+        if groups is None:
+            if category not in QUEST_TYPES:
+                raise ValueError(f"Unknown quest category: {category}")
+            groups = self._groups[category] = self._build_groups(category)
+        if check and category not in self._checked:
+            self._report_materials(category)
+            self._checked.add(category)
+        return groups
+
+    def _build_groups(self, category):
+        spec = QUEST_TYPES[category]
+        if 'catalog' not in spec:
+            return [([None], spec['prefix'], spec['progress_range'])]
+        self.load_catalogs([category])
+        catalog = self.catalogs[spec['catalog']]
+        if 'tiers' in spec:
+            groups = [(catalog[rarity], prefix, progress_range) for rarity, prefix, progress_range in spec['tiers']]
+        else:
+            groups = [(catalog, spec['prefix'], spec['progress_range'])]
+
+        seen = {}
+        deduplicated = []
+        for names, prefix, progress_range in groups:
+            kept = []
+            for name in names:
+                key = MaterialIndex.normalize(name)
+                if key in seen:
+                    warnings.warn(f"{spec['catalog']}: skipping {name}, already listed as {seen[key]}",
+                                  CatalogWarning, stacklevel=2)
+                    continue
+                seen[key] = name
+                kept.append(name)
+            deduplicated.append((kept, prefix, progress_range))
+        return deduplicated
+
+    def _report_materials(self, category):
+        unknown = self.check_materials(category)
+        if not unknown:
+            return
+        listed = ', '.join(name if material == name else f'{name} ({material})' for name, material in unknown.items())
+        message = f"{category}: unknown item materials: {listed}"
+        if self.strict_materials:
+            raise ValueError(message)
+        warnings.warn(message, CatalogWarning, stacklevel=2)
+
+    def _batch_plan(self, category):
+        # Flat entry, prefix, low and high lists of a category for generate_batch
+        plan = self._batch_plans.get(category)
+        if plan is None:
+            names, prefixes, lows, highs = [], [], [], []
+            for group_names, prefix, progress_range in self._category_groups(category):
+                names.extend(group_names)
+                prefixes.extend([prefix] * len(group_names))
+                for low, high in self._progress_ranges(category, group_names, progress_range):
+                    lows.append(low)
+                    highs.append(high)
+            numpy = load_numpy()
+            if numpy is not None:
+                lows, highs = numpy.array(lows), numpy.array(highs)
+            plan = self._batch_plans[category] = (names, prefixes, lows, highs)
+        return plan
+
+    def _id_allocator(self, category, known_ids=None):
+        # IDs of a category share one counter; a single quest is numbered SINGLE_QUEST_NUMBER
+        start = 0 if 'catalog' in QUEST_TYPES[category] else SINGLE_QUEST_NUMBER - 1
+        return QuestIdAllocator(self.reserved_ids, start, known=known_ids)
+
+    def _generate(self, category, seed, ids):
+        quests = []
+        for names, prefix, progress_range in self._category_groups(category):
+            for name, (low, high) in zip(names, self._progress_ranges(category, names, progress_range)):
+                key = (category,) if name is None else (category, name)
+                required_progress = QuestRandom(seed, *key).randint(low, high)
+                quests.append(Quest(ids.allocate(prefix, entry_key(name)), category, name, required_progress))
+        return quests
+
+    def _generate_batch(self, category, seed, known_ids=None):
+        names, prefixes, lows, highs = self._batch_plan(category)
+        progress = draw_progress_batch(seed_int(seed, category), lows, highs)
+        difficulties = assign_difficulties(progress)
+        allocate = self._id_allocator(category, known_ids).allocate
+        # The records only hold strings and numbers, so pausing the cyclic garbage
+        # collector avoids rescanning the growing pool on every collection
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [
+                Quest(allocate(prefix, entry_key(name)), category, name, value, difficulty)
+                for name, prefix, value, difficulty in zip(names, prefixes, progress, difficulties)
+            ]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+class FragmentCache:
+    """Bounded LRU cache of serialized quest bodies
+
+    The YAML of a quest only depends on its ID in its first line, so the
+    lines below it are cached on (type, variable, progress, difficulty,
+    TEMPLATE_VERSION) and shared by every quest with the same values.
+    """
+
+    def __init__(self, maxsize=FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._bodies = OrderedDict()
+
+    def __len__(self):
+        return len(self._bodies)
+
+    def body(self, quest):
+        """The serialized lines below the ID of a Quest record"""
+        key = (quest.type, quest.variable, quest.progress, quest.tier, TEMPLATE_VERSION)
+        body = self._bodies.get(key)
+        if body is not None:
+            self.hits += 1
+            self._bodies.move_to_end(key)
+            return body
+        self.misses += 1
+        fragment = yaml.dump({'id': quest.to_dict()}, Dumper=YamlDumper, default_flow_style=False)
+        body = self._bodies[key] = fragment[fragment.index('\n') + 1:]
+        if len(self._bodies) > self.maxsize:
+            self._bodies.popitem(last=False)
+        return body
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._bodies), 'maxsize': self.maxsize}
+
+    def clear(self):
+        self._bodies.clear()
+        self.hits = self.misses = 0
+
+# Shared by every serialize_quests call of the process
+FRAGMENT_CACHE = FragmentCache()
+
+_PLAIN_ID = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+_id_resolver = yaml.resolver.Resolver()
+
+def _is_plain_id(quest_id):
+    # IDs that YAML writes unquoted, such as 'mine_1' but not '1' or 'yes'
+    return (isinstance(quest_id, str) and _PLAIN_ID.fullmatch(quest_id) is not None
+            and _id_resolver.resolve(yaml.ScalarNode, quest_id, (True, False)) == 'tag:yaml.org,2002:str')
+
+def serialize_quests(quests, cache=FRAGMENT_CACHE):
+    """Serialize every quest on its own, returning (quest ID, YAML) pairs sorted by ID
+
+    'quests' is either a dict of quest ID -> quest dict or an iterable of
+    Quest records, which are only rendered while they are serialized. The
+    bodies of records come from 'cache' (a FragmentCache, or None to always
+    serialize), so identical quests are only rendered and dumped once.
+    """
+    if isinstance(quests, dict):
+        items = ((quest_id, quests[quest_id]) for quest_id in sorted(quests))
+    elif cache is not None:
+        return [
+            (quest.id, f'{quest.id}:\n{cache.body(quest)}') if _is_plain_id(quest.id)
+            else (quest.id, yaml.dump({quest.id: quest.to_dict()}, Dumper=YamlDumper, default_flow_style=False))
+            for quest in sorted(quests, key=attrgetter('id'))
+        ]
+    else:
+        items = ((quest.id, quest.to_dict()) for quest in sorted(quests, key=attrgetter('id')))
+    return [
+        (quest_id, yaml.dump({quest_id: quest}, Dumper=YamlDumper, default_flow_style=False))
+        for quest_id, quest in items
+    ]
+
+def file_digest(path):
+    """SHA-256 of a file's contents, or None if it does not exist"""
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+# How written files are flushed to disk: not at all (left to the OS), every
+# file before it is renamed into place, or the whole batch with one sync
+FSYNC_MODES = ('none', 'file', 'batch')
+
+def _write_temp(path, chunks, fsync=False):
+    # Write the chunks to a temp file next to path and return its path. The
+    # name is unique per process and the caller never writes one path twice
+    directory, name = os.path.split(path)
+    temp_path = os.path.join(directory, f'.{name}.{os.getpid()}.tmp')
+    try:
+        with open(temp_path, 'wb') as file:
+            for chunk in chunks:
+                file.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path
+
+def _sync_path(path):
+    with open(path, 'rb+') as file:
+        os.fsync(file.fileno())
+
+def _sync_paths(paths):
+    # Flush only the files of a batch, once they are all written. The fsyncs
+    # run in parallel, as each one mostly waits on the storage
+    with ThreadPoolExecutor(min(32, len(paths))) as executor:
+        list(executor.map(_sync_path, paths))
+
+def _sync_directory(directory):
+    # Persist the renames into a directory; directories cannot be opened on Windows
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_atomic(path, chunks, fsync='none'):
+    """Write text or bytes chunks to a temp file and rename it over path
+
+    Readers of path see either the old or the new contents, never a
+    partially written file.
+    """
+    if fsync not in FSYNC_MODES:
+        raise ValueError(f"Unknown fsync mode: {fsync}")
+    os.replace(_write_temp(path, chunks, fsync != 'none'), path)
+    if fsync != 'none':
+        _sync_directory(os.path.dirname(path))
+
+def write_files(files, fsync='none'):
+    """Atomically write a batch of files, each in its own thread
+
+    files maps every path to the chunks it should contain. All files are
+    written to temp files first and only renamed into place once the whole
+    batch is written, so a failed batch leaves every file untouched.
+    fsync='file' syncs each temp file as it is written, fsync='batch' syncs
+    the temp files of the batch together once they are all written. Neither
+    flushes other files on the host.
+    """
+    if fsync not in FSYNC_MODES:
+        raise ValueError(f"Unknown fsync mode: {fsync}")
+    if not files:
+        return
+    paths = list(files)
+    with ThreadPoolExecutor(min(32, len(paths))) as executor:
+        futures = [executor.submit(_write_temp, path, files[path], fsync == 'file') for path in paths]
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    if errors:
+        for future in futures:
+            if future.exception() is None:
+                os.remove(future.result())
+        raise errors[0]
+
+    temp_paths = [future.result() for future in futures]
+    if fsync == 'batch':
+        try:
+            _sync_paths(temp_paths)
+        except BaseException:
+            for temp_path in temp_paths:
+                os.remove(temp_path)
+            raise
+    for temp_path, path in zip(temp_paths, paths):
+        os.replace(temp_path, path)
+    if fsync != 'none':
+        for directory in {os.path.dirname(path) for path in paths}:
+            _sync_directory(directory)
+
+def _quest_file_chunks(fragments):
+    # Text chunks of a quest file; an empty file is '{}'
+    return [fragment for _, fragment in fragments] or ['{}\n']
+
+def _file_contents(chunks):
+    # Digest and size of the text or bytes chunks of a file
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        data = chunk if isinstance(chunk, bytes) else chunk.encode()
+        digest.update(data)
+        size += len(data)
+    return digest.hexdigest(), size
+
+def write_quest_file(filename, fragments, quests_dir=QUESTS_DIR, hooks=None, fsync='none'):
+    """Atomically write serialized quests to a file in the order given, returning its digest
+
+    A file whose contents would not change is left alone, so its mtime only
+    moves when the quests in it do.
+    """
+    return write_output_file(filename, _quest_file_chunks(fragments), quests_dir, hooks, fsync)
+
+def write_quest_files(fragments_by_file, quests_dir=QUESTS_DIR, hooks=None, fsync='none'):
+    """Atomically write a batch of quest files concurrently, returning the digest of each
+
+    Like write_quest_file, files whose contents would not change are left
+    alone.
+    """
+    return write_output_files({filename: _quest_file_chunks(fragments)
+                               for filename, fragments in fragments_by_file.items()}, quests_dir, hooks, fsync)
+
+def write_output_file(filename, chunks, directory, hooks=None, fsync='none'):
+    """Atomically write the text or bytes chunks of a file unless it already holds them, returning its digest"""
+    digest, size = _file_contents(chunks)
+    path = os.path.join(directory, filename)
+    changed = file_digest(path) != digest
+    if changed:
+        write_atomic(path, chunks, fsync)
+    if hooks is not None:
+        hooks.file_written(filename, size, changed)
+    return digest
+
+def write_output_files(chunks_by_file, directory, hooks=None, fsync='none'):
+    """Like write_output_file for a batch of files, written concurrently and renamed together"""
+    digests, files, written = {}, {}, []
+    for filename, chunks in chunks_by_file.items():
+        digest, size = _file_contents(chunks)
+        path = os.path.join(directory, filename)
+        changed = file_digest(path) != digest
+        if changed:
+            files[path] = chunks
+        digests[filename] = digest
+        written.append((filename, size, changed))
+    write_files(files, fsync)
+    if hooks is not None:
+        for filename, size, changed in written:
+            hooks.file_written(filename, size, changed)
+    return digests
+
+def iter_quest_fragments(filename, quests_dir=QUESTS_DIR):
+    """Lazily split a quest file written by write_quest_file back into (quest ID, YAML) pairs"""
+    with open(os.path.join(quests_dir, filename), 'r') as file:
+        quest_id, lines = None, []
+        for line in file:
+            if line[0] in ' -' and lines:
+                lines.append(line)
+                continue
+            if lines:
+                yield quest_id, ''.join(lines)
+            if line == '{}\n':
+                quest_id, lines = None, []
+            elif line[0] in '\'"':
+                quest_id, lines = next(iter(yaml.load(line, Loader=YamlLoader))), [line]
+            else:
+                quest_id, lines = line[:line.index(':')], [line]
+        if lines:
+            yield quest_id, ''.join(lines)
+
+def _quest_items(quests):
+    # (quest ID, quest dict) pairs sorted by ID, from a dict or Quest records
+    if isinstance(quests, dict):
+        return [(quest_id, quests[quest_id]) for quest_id in sorted(quests)]
+    return [(quest.id, quest.to_dict()) for quest in sorted(quests, key=attrgetter('id'))]
+
+def _dump_json(items):
+    return [json.dumps(dict(items), ensure_ascii=False, separators=(',', ':')) + '\n']
+
+def _dump_jsonl(items):
+    # One quest per line, its ID first
+    return [json.dumps({'id': quest_id, **quest}, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for quest_id, quest in items]
+
+# msgpack module once load_msgpack has tried to import it
+_msgpack = False
+
+def load_msgpack():
+    """msgpack, imported on first use as only its export needs it, or None when it is not installed"""
+    global _msgpack
+    if _msgpack is False:
+        try:
+            import msgpack
+        except ImportError:  # msgpack is optional
+            msgpack = None
+        _msgpack = msgpack
+    return _msgpack
+
+def _dump_msgpack(items):
+    return [load_msgpack().packb(dict(items), use_bin_type=True)]
+
+# File extension and dump function of every format the quest files can be
+# exported to. A dump function takes (quest ID, quest dict) pairs in ID
+# order and returns the text or bytes chunks of the file
+EXPORT_FORMATS = {
+    'json': ('.json', _dump_json),
+    'jsonl': ('.jsonl', _dump_jsonl),
+    'msgpack': ('.msgpack', _dump_msgpack),
+}
+
+def export_format(name):
+    """(extension, dump function) of an export format, or a ValueError if it cannot be written"""
+    if name not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {name} (choose from {', '.join(EXPORT_FORMATS)})")
+    if name == 'msgpack' and load_msgpack() is None:
+        raise ValueError("The msgpack export needs the msgpack package (pip install msgpack)")
+    return EXPORT_FORMATS[name]
 
 # Function to save quest file
-def save_quest_file(filename, data):
-    with open(f'Quests/{filename}', 'w') as file:
-        yaml.dump(data, file, default_flow_style=False)
-
-# Save all quest files
-save_quest_file('mobs.yml', generated_mob_quests)
-save_quest_file('mining.yml', generated_mining_quests)
-save_quest_file('building.yml', generated_placing_quests)
-save_quest_file('foods.yml', generated_food_quests)
-save_quest_file('smelting.yml', generated_smelting_quests)
-save_quest_file('taming.yml', generated_taming_quests)
-save_quest_file('riding.yml', generated_riding_quests)
-save_quest_file('shearing.yml', generated_shearing_quests)
-save_quest_file('milk.yml', generated_milk_quests)
-save_quest_file('move.yml', generated_move_quests)
-save_quest_file('swim.yml', generated_swim_quests)
-save_quest_file('sprint.yml', generated_sprint_quests)
-save_quest_file('sneak.yml', generated_sneak_quests)
-save_quest_file('glide.yml', generated_glide_quests)
-save_quest_file('fly.yml', generated_fly_quests)
-save_quest_file('gain_experience.yml', generated_gain_experience_quests)
-
-# Combine all generated quests into a single dictionary
-all_generated_quests = {}
-all_generated_quests.update(generated_mob_quests)
-all_generated_quests.update(generated_mining_quests)
-all_generated_quests.update(generated_placing_quests)
-all_generated_quests.update(generated_food_quests)
-all_generated_quests.update(generated_smelting_quests)
-all_generated_quests.update(generated_taming_quests)
-all_generated_quests.update(generated_riding_quests)
-all_generated_quests.update(generated_shearing_quests)
-all_generated_quests.update(generated_milk_quests)
-all_generated_quests.update(generated_move_quests)
-all_generated_quests.update(generated_swim_quests)
-all_generated_quests.update(generated_sprint_quests)
-all_generated_quests.update(generated_sneak_quests)
-all_generated_quests.update(generated_glide_quests)
-all_generated_quests.update(generated_fly_quests)
-all_generated_quests.update(generated_gain_experience_quests)
-
-# Save all generated quests into a single file
-save_quest_file('extra.yml', all_generated_quests)
-
-print("Generated quests have been saved in their respective files.")
+def save_quest_file(filename, data, quests_dir=QUESTS_DIR, format='yaml'):
+    """Save quests to a file as YAML, or in one of EXPORT_FORMATS"""
+    if format == 'yaml':
+        write_quest_file(filename, serialize_quests(data), quests_dir)
+    else:
+        _, dump = export_format(format)
+        write_output_file(filename, dump(_quest_items(data)), quests_dir)
+
+def save_exports(pool, formats, exports_dir=EXPORTS_DIR, hooks=None, fsync='none'):
+    """Write every category of a QuestPool and all of its quests combined in each export format
+
+    pool can also be a dict of category -> quest records or quest ID ->
+    quest dict. Every quest is rendered once and the same dicts are dumped
+    to every format, as <category><extension> and extra<extension>.
+    Returns the digest of every file.
+    """
+    dumps = [export_format(name) for name in formats]
+    os.makedirs(exports_dir, exist_ok=True)
+    items_by_name = {category: _quest_items(pool[category]) for category in pool}
+    items_by_name['extra'] = list(heapq.merge(*items_by_name.values(), key=itemgetter(0)))
+    return write_output_files({
+        f'{name}{extension}': dump(items)
+        for extension, dump in dumps for name, items in items_by_name.items()
+    }, exports_dir, hooks, fsync)
+
+def save_category(category, quests, quests_dir=QUESTS_DIR, hooks=None, fsync='none'):
+    """Save a category to Quests/<category>.yml, returning the file's digest"""
+    hooks = hooks or GenerationHooks()
+    with hooks.stage('serialize'):
+        fragments = serialize_quests(quests)
+    with hooks.stage('write'):
+        return write_quest_file(f'{category}.yml', fragments, quests_dir, hooks, fsync)
+
+def merge_extra(fragments_by_category):
+    """Lazily merge the serialized quests of every category in ID order
+
+    The category files are already sorted by ID, so extra.yml is a merge of
+    them. A quest ID used by two categories raises a ValueError.
+    """
+    previous_id = None
+    for quest_id, fragment in heapq.merge(*fragments_by_category):
+        if quest_id == previous_id:
+            raise ValueError(f"Duplicate quest ID: {quest_id}")
+        previous_id = quest_id
+        yield quest_id, fragment
+
+def save_extra(fragments_by_category, quests_dir=QUESTS_DIR, hooks=None, fsync='none'):
+    """Save the serialized quests of every category combined into extra.yml, returning its digest"""
+    return write_quest_file('extra.yml', merge_extra(fragments_by_category), quests_dir, hooks, fsync)
+
+def save_quest_files(quests_by_category, quests_dir=QUESTS_DIR):
+    """Save every category to its own file and all quests combined into extra.yml
+
+    Each quest is serialized once and the same text is reused for extra.yml.
+    """
+    # Create 'Quests' folder if it doesn't exist
+    os.makedirs(quests_dir, exist_ok=True)
+
+    fragments_by_file = {f'{category}.yml': serialize_quests(quests)
+                         for category, quests in quests_by_category.items()}
+    fragments_by_file['extra.yml'] = list(merge_extra(fragments_by_file.values()))
+    write_quest_files(fragments_by_file, quests_dir)
+
+def _fragment_variable(fragment):
+    # The variable of a serialized quest, read from its own line without parsing the quest
+    start = fragment.find('\n  variable: ')
+    if start < 0:
+        return None
+    end = fragment.index('\n', start + 1)
+    return yaml.load(fragment[start + 3:end], Loader=YamlLoader)['variable']
+
+def build_shards(fragments_by_category, shard_size):
+    """Split serialized quests into shards of at most shard_size bytes
+
+    The quests are kept in category order, then ID order, so the quests of
+    a category sit in as few shards as possible. A quest larger than
+    shard_size gets a shard of its own. Returns the fragments of every
+    shard file and the index mapping each quest ID to [shard, byte offset,
+    length, type, variable]. A shard_size below 1 raises a ValueError.
+    """
+    if shard_size < 1:
+        raise ValueError(f"The shard size must be at least 1 byte, not {shard_size}")
+    shards, shard_infos, quests = {}, [], {}
+    fragments, info, size = None, None, shard_size + 1
+    for category, category_fragments in fragments_by_category.items():
+        quest_type = QUEST_TYPES[category]['type']
+        for quest_id, fragment in category_fragments:
+            length = len(fragment.encode())
+            if size + length > shard_size and size > 0:
+                filename = f'extra-{len(shards) + 1:04d}.yml'
+                fragments = shards[filename] = []
+                info = {'file': filename, 'quests': 0, 'bytes': 0, 'types': []}
+                shard_infos.append(info)
+                size = 0
+            fragments.append((quest_id, fragment))
+            quests[quest_id] = [len(shard_infos) - 1, size, length, quest_type, _fragment_variable(fragment)]
+            size += length
+            info['quests'] += 1
+            info['bytes'] = size
+            if quest_type not in info['types']:
+                info['types'].append(quest_type)
+    return shards, {'version': 1, 'shard_size': shard_size, 'shards': shard_infos, 'quests': quests}
+
+def save_shards(fragments_by_category, shard_size, shards_dir=SHARDS_DIR, hooks=None, fsync='none'):
+    """Write the quests of every category as shards with an index.json, returning the index
+
+    Shards left over from a previous run with more shards are removed.
+    """
+    shards, index = build_shards(fragments_by_category, shard_size)
+    os.makedirs(shards_dir, exist_ok=True)
+    write_quest_files(shards, shards_dir, hooks, fsync)
+    path = os.path.join(shards_dir, SHARD_INDEX_FILE)
+    content = json.dumps(index, separators=(',', ':'), ensure_ascii=False) + '\n'
+    if file_digest(path) != hashlib.sha256(content.encode()).hexdigest():
+        write_atomic(path, [content], fsync)
+    for filename in os.listdir(shards_dir):
+        if re.fullmatch(r'extra-\d+\.yml', filename) and filename not in shards:
+            os.remove(os.path.join(shards_dir, filename))
+    return index
+
+class ShardIndex:
+    """Reads single quests or quest types from a sharded output without parsing the rest"""
+
+    def __init__(self, shards_dir=SHARDS_DIR):
+        self.shards_dir = shards_dir
+        with open(os.path.join(shards_dir, SHARD_INDEX_FILE), 'r') as file:
+            index = json.load(file)
+        self.shards = index['shards']
+        self.quests = index['quests']
+
+    def quest(self, quest_id):
+        """Load one quest dict by seeking straight to it"""
+        shard, offset, length, _, _ = self.quests[quest_id]
+        with open(os.path.join(self.shards_dir, self.shards[shard]['file']), 'rb') as file:
+            file.seek(offset)
+            return yaml.load(file.read(length), Loader=YamlLoader)[quest_id]
+
+    def shards_of_type(self, quest_type):
+        """Files of the shards that hold quests of a type"""
+        return [info['file'] for info in self.shards if quest_type in info['types']]
+
+    def load_type(self, quest_type, variable=None):
+        """Load every quest of a type, optionally of one variable, as ID -> quest dict"""
+        quests = {}
+        for filename in self.shards_of_type(quest_type):
+            with open(os.path.join(self.shards_dir, filename), 'r') as file:
+                quests.update(yaml.load(file, Loader=YamlLoader))
+        return {
+            quest_id: quest for quest_id, quest in quests.items()
+            if quest['type'] == quest_type and (variable is None or quest.get('variable') == variable)
+        }
+
+def load_manifest(quests_dir=QUESTS_DIR):
+    """Load the manifest of the previous run, or an empty one"""
+    try:
+        with open(os.path.join(quests_dir, MANIFEST_FILE), 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+def save_manifest(manifest, quests_dir=QUESTS_DIR, fsync='none'):
+    path = os.path.join(quests_dir, MANIFEST_FILE)
+    content = json.dumps(manifest, indent=2, sort_keys=True) + '\n'
+    if file_digest(path) != hashlib.sha256(content.encode()).hexdigest():
+        write_atomic(path, [content], fsync)
+
+def write_player_passes_jsonl(passes, file):
+    """Write one JSON line per player, returning the number of players written"""
+    count = 0
+    for player, quests in passes:
+        file.write(json.dumps({'player': player, 'quests': quests}, ensure_ascii=False))
+        file.write('\n')
+        count += 1
+    return count
+
+def write_player_passes_yaml(passes, players_dir):
+    """Write every pass to <players_dir>/<player>.yml, returning the number of players written
+
+    Each pass is a dict of quest ID -> quest dict or a list of Quest records.
+    """
+    os.makedirs(players_dir, exist_ok=True)
+    count = 0
+    for player, quests in passes:
+        if not re.fullmatch(r'[\w-]+', player):
+            raise ValueError(f"Invalid player name: {player!r}")
+        write_quest_file(f'{player}.yml', serialize_quests(quests), players_dir)
+        count += 1
+    return count
+
+# Generator used by the worker processes of QuestGenerator.run
+_worker_generator = None
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+class _FileSizeHooks(GenerationHooks):
+    # Remembers the last file written so workers can report it to the parent
+    def file_written(self, filename, size, changed):
+        self.size, self.changed = size, changed
+
+def _save_category_job(category, seed, quests_dir, fsync, known_ids=None):
+    quests = _worker_generator.generate_records(category, seed, known_ids)
+    type_counts = Counter(quest.type for quest in quests)
+    hooks = _FileSizeHooks()
+    digest = save_category(category, quests, quests_dir, hooks, fsync)
+    return digest, type_counts, hooks.size, hooks.changed, quest_ids(quests)
+
+def parse_shard_size(value):
+    """Parse the --shard-size, a positive number of bytes"""
+    try:
+        size = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    if size < 1:
+        raise argparse.ArgumentTypeError(f"the shard size must be at least 1 byte, not {size}")
+    return size
+
+def parse_export_formats(value):
+    """Parse the comma separated --export formats"""
+    formats = [name.strip() for name in value.split(',') if name.strip()]
+    try:
+        for name in formats:
+            export_format(name)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+    return formats
+
+def parse_categories(value):
+    """Parse a comma separated list of categories"""
+    categories = [category.strip() for category in value.split(',') if category.strip()]
+    unknown = [category for category in categories if category not in QUEST_TYPES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown categories: {', '.join(unknown)} "
+                                         f"(choose from {', '.join(CATEGORIES)})")
+    return categories
+
+# Subcommands of the command line; without one, 'generate' is run
+COMMANDS = ('generate', 'passes', 'categories')
+
+def parse_args(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['generate'] + argv
+
+    # Options of every command that generates quests
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--seed', help='seed for reproducible output (default: a random seed)')
+    common.add_argument('--strict-materials', action='store_true',
+                        help=f'fail instead of warning when a quest item is not listed in List/{MATERIALS_CATALOG}')
+    common.add_argument('--no-cache', action='store_true',
+                        help=f'always parse the List/ catalogs instead of using the cache in {CACHE_DIR}')
+    common.add_argument('--profile', action='store_true',
+                        help='print timings, allocations, quest counts and file sizes per stage as JSON to stderr')
+    common.add_argument('--metrics-file', metavar='FILE',
+                        help='write the --profile metrics to FILE in the Prometheus text format')
+
+    parser = argparse.ArgumentParser(description='Generate battlepass quest files from the List/ catalogs.')
+    subparsers = parser.add_subparsers(dest='command', metavar='{generate,passes,categories}')
+
+    generate_parser = subparsers.add_parser('generate', parents=[common],
+                                            help='generate the quest files (the default command)')
+    generate_parser.add_argument('--only', type=parse_categories, metavar='CATEGORIES',
+                                 help='only regenerate these comma separated categories, loading only their '
+                                      'catalogs and reusing the seed of the last run unless --seed is given')
+    generate_parser.add_argument('--jobs', '-j', type=int, default=1,
+                                 help='number of worker processes used to generate the categories (default: 1)')
+    generate_parser.add_argument('--incremental', action='store_true',
+                                 help='only regenerate categories whose catalogs or config changed since the last run')
+    generate_parser.add_argument('--vectorized', action='store_true',
+                                 help='draw the progress of each category in one batch (uses NumPy when installed); '
+                                      'faster for large catalogs but catalog edits can change other quests')
+    generate_parser.add_argument('--shard-size', type=parse_shard_size, metavar='BYTES',
+                                 help='also write the quests of every category to shards of at most BYTES bytes '
+                                      'with an index of every quest')
+    generate_parser.add_argument('--shards-dir', default=SHARDS_DIR,
+                                 help=f'folder of the --shard-size shards (default: {SHARDS_DIR})')
+    generate_parser.add_argument('--export', type=parse_export_formats, default=(), metavar='FORMATS',
+                                 help=f"also write the quest files in these comma separated formats "
+                                      f"({', '.join(EXPORT_FORMATS)}) to --exports-dir")
+    generate_parser.add_argument('--exports-dir', default=EXPORTS_DIR,
+                                 help=f'folder of the --export files (default: {EXPORTS_DIR})')
+    generate_parser.add_argument('--fsync', choices=FSYNC_MODES, default='none',
+                                 help='flush the written files to disk: never, every file, or once per batch of '
+                                      'files (default: none)')
+    # Kept for scripts written before the passes command
+    generate_parser.add_argument('--players', help=argparse.SUPPRESS)
+    generate_parser.add_argument('--format', choices=['jsonl', 'yaml'], default='jsonl', help=argparse.SUPPRESS)
+    generate_parser.add_argument('--output', '-o', help=argparse.SUPPRESS)
+
+    passes_parser = subparsers.add_parser('passes', parents=[common],
+                                          help='generate one pass per player instead of the quest files')
+    passes_parser.add_argument('players', metavar='PLAYERS',
+                               help="file of player names, one per line ('-' for stdin)")
+    passes_parser.add_argument('--format', choices=['jsonl', 'yaml'], default='jsonl',
+                               help='JSON Lines or one YAML file per player (default: jsonl)')
+    passes_parser.add_argument('--output', '-o',
+                               help='a file for jsonl (default: stdout) or a folder for yaml (default: players)')
+    passes_parser.set_defaults(vectorized=False)
+
+    subparsers.add_parser('categories', help='list the categories with the catalog and file of each')
+    return parser.parse_args(argv)
+
+def run_player_passes(generator, args):
+    seed = args.seed if args.seed is not None else new_seed()
+    try:
+        players = sys.stdin if args.players == '-' else open(args.players, 'r')
+    except OSError as error:
+        sys.exit(f"Error: {error}")
+    try:
+        if args.format == 'yaml':
+            # Records let the serialized quests shared by many passes come from FRAGMENT_CACHE
+            passes = generator.iter_player_passes(players, seed, records=True)
+            count = write_player_passes_yaml(passes, args.output or 'players')
+        elif args.output:
+            with open(args.output, 'w') as file:
+                count = write_player_passes_jsonl(generator.iter_player_passes(players, seed), file)
+        else:
+            count = write_player_passes_jsonl(generator.iter_player_passes(players, seed), sys.stdout)
+            sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader of stdout is gone (passes ... | head). Point stdout at
+        # devnull so the interpreter does not fail flushing it on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except OSError as error:
+        sys.exit(f"Error: {error}")
+    finally:
+        if players is not sys.stdin:
+            players.close()
+    print(f"Generated passes for {count} players. Seed: {seed}", file=sys.stderr)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'categories':
+        for category, spec in QUEST_TYPES.items():
+            print(f"{category}\t{spec.get('catalog', '-')}\t{category}.yml")
+        return 0
+
+    warnings.formatwarning = lambda message, category, *_, **__: f'{category.__name__}: {message}\n'
+    profiler = GenerationProfiler() if args.profile or args.metrics_file else None
+    generator = QuestGenerator(cache_dir=None if args.no_cache else CACHE_DIR, vectorized=args.vectorized,
+                               hooks=profiler, strict_materials=args.strict_materials)
+    try:
+        if args.players:
+            run_player_passes(generator, args)
+        else:
+            seed = generator.run(seed=args.seed, jobs=args.jobs, incremental=args.incremental, fsync=args.fsync,
+                                 shard_size=args.shard_size, shards_dir=args.shards_dir,
+                                 exports=args.export, exports_dir=args.exports_dir, categories=args.only)
+            print("Generated quests have been saved in their respective files.")
+            print(f"Seed: {seed}")
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+    if profiler is not None:
+        profiler.close()
+        if args.profile:
+            print(json.dumps(profiler.report(), indent=2), file=sys.stderr)
+        if args.metrics_file:
+            with open(args.metrics_file, 'w') as file:
+                file.write(profiler.to_prometheus())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Plan a season pass: a fixed number of quests within a points budget and difficulty mix
+
+    python planner.py --size 60 --budget 220 --mix easy=5,medium=3,hard=2 -o season.yml
+"""
+import os
+import sys
+import math
+import argparse
+
+from generator import (
+    CATEGORIES, DIFFICULTIES, QUEST_CONFIG, QuestGenerator, QuestPool,
+    new_seed, parse_categories, seed_int, serialize_quests, write_quest_file,
+)
+
+# Default share of each difficulty in a season pass
+SEASON_MIX = {'easy': 5, 'medium': 3, 'hard': 2}
+
+def _second_counts(rest, targets, low, high):
+    # Candidate counts of the second difficulty when it and the third share
+    # 'rest' quests. The deviation from the mix is convex in that count and
+    # flat between its target and rest minus the third's target, so the best
+    # count is next to one of those two bounds or at an end of [low, high]
+    counts = {low, high}
+    for bound in (targets[1], rest - targets[2]):
+        for count in (math.floor(bound), math.ceil(bound)):
+            counts.add(min(max(count, low), high))
+    return sorted(counts)
+
+def plan_tier_counts(available, size, budget=None, mix=SEASON_MIX):
+    """Pick how many quests of each difficulty a pass of 'size' quests takes
+
+    available maps each difficulty to its number of candidates. Quests of a
+    difficulty are all worth the same points, so the choice only depends on
+    the counts: among the splits that fit the budget, the one closest to the
+    mix wins, and ties go to the split that uses more of the budget. For
+    every count of the first difficulty, the best split of the other two is
+    found directly, which is O(size) for the three difficulties.
+    Raises ValueError when no split fits.
+    """
+    weight = sum(mix.get(difficulty, 0) for difficulty in DIFFICULTIES)
+    if weight <= 0:
+        raise ValueError("The difficulty mix needs a positive weight")
+    targets = [size * mix.get(difficulty, 0) / weight for difficulty in DIFFICULTIES]
+    points = [QUEST_CONFIG[difficulty]['points'] for difficulty in DIFFICULTIES]
+    limits = [available.get(difficulty, 0) for difficulty in DIFFICULTIES]
+
+    best, best_score = None, None
+    for first in range(min(size, limits[0]) + 1):
+        rest = size - first
+        low, high = max(0, rest - limits[2]), min(rest, limits[1])
+        if budget is not None:
+            # Each quest moved from the third difficulty to the second
+            # changes the points of the pass by 'step'
+            spare = budget - points[0] * first - points[2] * rest
+            step = points[1] - points[2]
+            if step > 0:
+                high = min(high, spare // step)
+            elif step < 0:
+                low = max(low, -(-spare // step))
+            elif spare < 0:
+                continue
+        if low > high:
+            continue
+        for second in _second_counts(rest, targets, low, high):
+            counts = (first, second, rest - second)
+            total = sum(count * value for count, value in zip(counts, points))
+            deviation = sum(abs(count - target) for count, target in zip(counts, targets))
+            score = (round(deviation, 9), -total)
+            if best_score is None or score < best_score:
+                best, best_score = counts, score
+    if best is None:
+        raise ValueError(f"No pass of {size} quests fits a budget of {budget} points "
+                         f"with {sum(limits)} candidates")
+    return dict(zip(DIFFICULTIES, best))
+
+def _spread(quests, count, seed):
+    # Take count quests, round robin over their categories in a seeded order,
+    # so no category fills a difficulty while another one is left out
+    by_category = {}
+    for quest in sorted(quests, key=lambda quest: seed_int(seed, 'plan', quest.category, quest.id)):
+        by_category.setdefault(quest.category, []).append(quest)
+    queues = sorted(by_category.values(), key=lambda queue: seed_int(seed, 'plan', queue[0].category))
+
+    picked = []
+    position = 0
+    while len(picked) < count:
+        for queue in queues:
+            if position < len(queue):
+                picked.append(queue[position])
+                if len(picked) == count:
+                    break
+        position += 1
+    return picked
+
+def plan_season(candidates, size, budget=None, mix=SEASON_MIX, seed=0):
+    """Select a season pass from candidate Quest records, returned as a QuestPool
+
+    The number of quests of each difficulty comes from plan_tier_counts, and
+    within a difficulty the quests are spread over as many categories as
+    possible. The same candidates and seed always give the same pass.
+    """
+    by_difficulty = {difficulty: [] for difficulty in DIFFICULTIES}
+    for quest in candidates:
+        by_difficulty[quest.difficulty].append(quest)
+    counts = plan_tier_counts({difficulty: len(quests) for difficulty, quests in by_difficulty.items()},
+                              size, budget, mix)
+
+    selected = {}
+    for difficulty, count in counts.items():
+        for quest in _spread(by_difficulty[difficulty], count, seed):
+            selected.setdefault(quest.category, []).append(quest)
+    return QuestPool({category: selected[category] for category in CATEGORIES if category in selected})
+
+def parse_mix(value):
+    """Parse a difficulty mix such as 'easy=5,medium=3,hard=2'"""
+    mix = {}
+    for part in value.split(','):
+        difficulty, _, weight = part.partition('=')
+        if difficulty not in QUEST_CONFIG:
+            raise argparse.ArgumentTypeError(f"unknown difficulty: {difficulty}")
+        try:
+            mix[difficulty] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for {difficulty}: {weight}")
+    return mix
+
+def parse_size(value):
+    """Parse the --size, a positive number of quests"""
+    try:
+        size = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    if size < 1:
+        raise argparse.ArgumentTypeError(f"a pass needs at least 1 quest, not {size}")
+    return size
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Select a season pass from the generated quests.')
+    parser.add_argument('--size', type=parse_size, required=True, help='number of quests in the pass')
+    parser.add_argument('--budget', type=int, help='maximum total points of the pass (default: no limit)')
+    parser.add_argument('--mix', type=parse_mix, default=SEASON_MIX,
+                        help='relative share of each difficulty (default: easy=5,medium=3,hard=2)')
+    parser.add_argument('--categories', type=parse_categories, default=','.join(CATEGORIES),
+                        help='comma separated categories to draw candidates from (default: all)')
+    parser.add_argument('--seed', help='seed for the candidate quests and the selection (default: a random seed)')
+    # Not in Quests/ by default: the generator reserves the IDs of any other file there
+    parser.add_argument('--output', '-o', default='season.yml',
+                        help='quest file to write (default: season.yml)')
+    args = parser.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else new_seed()
+    candidates = QuestGenerator().generate_pool(seed, args.categories).extra()
+    try:
+        season = plan_season(candidates, args.size, args.budget, args.mix, seed)
+    except ValueError as error:
+        parser.error(str(error))
+
+    directory, filename = os.path.split(args.output)
+    write_quest_file(filename, serialize_quests(season.extra()), directory or '.')
+    points = sum(quest.points for quest in season.extra())
+    print(f"Planned {len(season)} quests worth {points} points into {args.output}")
+    print(f"Seed: {seed}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Build a season rotation of daily, weekly and event quests, and look up the active ones
+
+    python rotation.py build --start 2026-09-01 --days 84 --daily 3 --weekly 5 --seed 42
+    python rotation.py active --at 2026-09-05T12:00
+"""
+import os
+import sys
+import json
+import argparse
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from generator import (
+    CATEGORIES, DIFFICULTIES, QUESTS_DIR, Quest, load_manifest, load_yaml_file, new_seed, seed_int, write_atomic,
+)
+from planner import SEASON_MIX
+from events import load_checked, parse_event_time
+
+ROTATION_FILE = 'rotation.json'
+
+class RotationCalendar:
+    """Active quests over time, precomputed for every elementary segment
+
+    The start and end of every interval are sorted into boundaries, and the
+    quests active between two neighbouring boundaries are stored once, so
+    finding the quests active at a moment is a bisect over the boundaries.
+    """
+
+    def __init__(self, bounds, segments):
+        self.bounds = bounds
+        self.segments = segments
+
+    @classmethod
+    def from_intervals(cls, intervals):
+        """Build the calendar from (start, end, slot, quest ID) intervals, end excluded"""
+        changes = {}
+        for start, end, slot, quest_id in intervals:
+            if start < end:
+                changes.setdefault(start, []).append((1, slot, quest_id))
+                changes.setdefault(end, []).append((-1, slot, quest_id))
+        bounds = sorted(changes)
+        segments = []
+        active = {}
+        for bound in bounds:
+            for change, slot, quest_id in changes[bound]:
+                key = (slot, quest_id)
+                active[key] = active.get(key, 0) + change
+                if not active[key]:
+                    del active[key]
+            segments.append(sorted(active))
+        return cls(bounds, segments)
+
+    def active(self, moment):
+        """(slot, quest ID) of every quest active at a moment"""
+        index = bisect_right(self.bounds, moment) - 1
+        return self.segments[index] if index >= 0 else []
+
+    def to_dict(self):
+        return {
+            'bounds': [bound.isoformat(timespec='minutes') for bound in self.bounds],
+            'segments': [[list(entry) for entry in segment] for segment in self.segments],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([datetime.fromisoformat(bound) for bound in data['bounds']],
+                   [[tuple(entry) for entry in segment] for segment in data['segments']])
+
+    def save(self, path=ROTATION_FILE):
+        write_atomic(path, [json.dumps(self.to_dict(), separators=(',', ':')) + '\n'])
+
+    @classmethod
+    def load(cls, path=ROTATION_FILE):
+        with open(path, 'r') as file:
+            return cls.from_dict(json.load(file))
+
+def tier_counts(slots, size, mix=SEASON_MIX):
+    """Split 'slots' windows of 'size' quests each into per-difficulty counts
+
+    Each window takes the counts that keep the running total of every
+    difficulty closest to the mix, so the season stays balanced even when
+    a single window is too small to follow it.
+    """
+    weight = sum(mix.get(difficulty, 0) for difficulty in DIFFICULTIES)
+    if weight <= 0:
+        raise ValueError("The difficulty mix needs a positive weight")
+    taken = dict.fromkeys(DIFFICULTIES, 0)
+    windows = []
+    for window in range(1, slots + 1):
+        targets = {difficulty: window * size * mix.get(difficulty, 0) / weight for difficulty in DIFFICULTIES}
+        counts = dict.fromkeys(DIFFICULTIES, 0)
+        for _ in range(size):
+            # Largest remaining deficit first, in DIFFICULTIES order on ties
+            difficulty = max(DIFFICULTIES, key=lambda d: targets[d] - taken[d] - counts[d])
+            counts[difficulty] += 1
+        for difficulty in DIFFICULTIES:
+            taken[difficulty] += counts[difficulty]
+        windows.append(counts)
+    return windows
+
+def build_rotation(quests, start, days, daily=3, weekly=5, seed=0, mix=SEASON_MIX):
+    """Schedule daily and weekly slots over a season, returning (start, end, slot, quest ID) intervals
+
+    'quests' are the Quest records to rotate. Every week, counted from
+    'start', gets 'weekly' quests for the whole week and 'daily' quests for
+    each of its days, and no quest is used twice in the same week. The
+    difficulties of each slot follow tier_counts. A difficulty that runs
+    out within a week is made up from the others, and a ValueError is
+    raised when the pool cannot fill a week.
+    """
+    by_difficulty = {difficulty: [] for difficulty in DIFFICULTIES}
+    for quest in quests:
+        by_difficulty[quest.difficulty].append(quest.id)
+    weeks = (days + 6) // 7
+    weekly_counts = iter(tier_counts(weeks, weekly, mix))
+    daily_counts = iter(tier_counts(days, daily, mix))
+
+    intervals = []
+    for week in range(weeks):
+        week_start = start + timedelta(days=7 * week)
+        week_end = start + timedelta(days=min(7 * (week + 1), days))
+        # Every quest can be drawn once per week, in a seeded order
+        queues = {
+            difficulty: sorted(ids, key=lambda quest_id: seed_int(seed, 'rotation', week, quest_id), reverse=True)
+            for difficulty, ids in by_difficulty.items()
+        }
+
+        def take(counts):
+            picked = []
+            for difficulty, count in counts.items():
+                for _ in range(count):
+                    queue = queues[difficulty] or max(queues.values(), key=len)
+                    if not queue:
+                        raise ValueError(f"Not enough quests to fill week {week + 1} without repeats")
+                    picked.append(queue.pop())
+            return picked
+
+        for quest_id in take(next(weekly_counts)):
+            intervals.append((week_start, week_end, 'weekly', quest_id))
+        day = week_start
+        while day < week_end:
+            for quest_id in take(next(daily_counts)):
+                intervals.append((day, day + timedelta(days=1), 'daily', quest_id))
+            day += timedelta(days=1)
+    return intervals
+
+def deployed_quests(quests_dir=QUESTS_DIR):
+    """Quest records of the generated files in quests_dir, as players see them
+
+    The calendar only stores quest IDs, so it is built from the files that
+    are deployed rather than from a new draw, whose IDs could have other
+    difficulties.
+    """
+    quests = []
+    for category in CATEGORIES:
+        filename = f'{category}.yml'
+        if not os.path.exists(os.path.join(quests_dir, filename)):
+            raise ValueError(f"{os.path.join(quests_dir, filename)} is missing, run generator.py first")
+        for quest_id, quest in (load_yaml_file(filename, quests_dir) or {}).items():
+            quests.append(Quest(str(quest_id), category, quest.get('variable'), quest['required-progress']))
+    return quests
+
+def event_intervals(events_dir=os.path.join(QUESTS_DIR, 'events')):
+    """(start, end, slot, quest ID) of every quest in the event files, the slot being the file name"""
+    intervals = []
+    for filename in sorted(os.listdir(events_dir)):
+        if not filename.endswith('.yml'):
+            continue
+        data, _ = load_checked(os.path.join(events_dir, filename))
+        category = data['category']
+        start, end = parse_event_time(category['start']), parse_event_time(category['end'])
+        slot = f'event:{filename[:-4]}'
+        intervals.extend((start, end, slot, str(quest_id)) for quest_id in data.get('quests') or {})
+    return intervals
+
+def parse_moment(value):
+    """Parse an ISO date or date and time, as given on the command line"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date or time: {value}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and query a season rotation of quests.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='schedule a season and save its calendar')
+    build_parser.add_argument('--start', type=parse_moment, required=True, help='first day of the season (YYYY-MM-DD)')
+    build_parser.add_argument('--days', type=int, default=84, help='length of the season in days (default: 84)')
+    build_parser.add_argument('--daily', type=int, default=3, help='daily quests (default: 3)')
+    build_parser.add_argument('--weekly', type=int, default=5, help='weekly quests (default: 5)')
+    build_parser.add_argument('--seed', help='seed of the rotation (default: the seed of the last generator run)')
+    build_parser.add_argument('--no-events', action='store_true', help='leave out the Quests/events/ windows')
+    build_parser.add_argument('--output', '-o', default=ROTATION_FILE,
+                              help=f'calendar file to write (default: {ROTATION_FILE})')
+
+    active_parser = subparsers.add_parser('active', help='list the quests active at a moment')
+    active_parser.add_argument('--at', type=parse_moment, default=None, help='date and time (default: now)')
+    active_parser.add_argument('--calendar', '-c', default=ROTATION_FILE,
+                               help=f'calendar file to read (default: {ROTATION_FILE})')
+    args = parser.parse_args(argv)
+
+    if args.command == 'active':
+        calendar = RotationCalendar.load(args.calendar)
+        for slot, quest_id in calendar.active(args.at or datetime.now()):
+            print(f'{slot}\t{quest_id}')
+        return 0
+
+    seed = args.seed if args.seed is not None else load_manifest().get('seed', new_seed())
+    try:
+        intervals = build_rotation(deployed_quests(), args.start, args.days, args.daily, args.weekly, seed)
+    except ValueError as error:
+        parser.error(str(error))
+    if not args.no_events:
+        intervals.extend(event_intervals())
+    calendar = RotationCalendar.from_intervals(intervals)
+    calendar.save(args.output)
+    print(f"Scheduled {args.days} days in {len(calendar.bounds)} segments into {args.output}")
+    print(f"Seed: {seed}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
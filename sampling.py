@@ -0,0 +1,86 @@
+"""Weighted sampling with Walker alias tables, built with Vose's method"""
+import random
+
+# NumPy module once load_numpy has tried to import it
+_numpy = False
+
+def load_numpy():
+    """NumPy, or None when it is not installed
+
+    NumPy is optional and only imported on first use, as importing it takes
+    longer than most runs that do not need it.
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:  # callers fall back to pure Python
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+# Alias probabilities are integers out of ALIAS_SCALE, so a draw compares
+# integers and gives the same result on every platform
+ALIAS_SCALE = 1 << 32
+
+class AliasTable:
+    """Draw indexes in proportion to a fixed list of weights in O(1) per draw
+
+    Building the table is O(n). Each draw picks a column uniformly and then
+    either keeps it or takes its alias, so it needs at most two random
+    integers whatever the number of weights.
+    """
+
+    __slots__ = ('probabilities', 'aliases', '_arrays')
+
+    def __init__(self, weights):
+        weights = list(weights)
+        total = sum(weights)
+        if not weights or total <= 0 or min(weights) < 0:
+            raise ValueError("An alias table needs non-negative weights with a positive total")
+        count = len(weights)
+        scaled = [weight * count / total for weight in weights]
+        probabilities = [ALIAS_SCALE] * count
+        aliases = list(range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1]
+        large = [index for index, value in enumerate(scaled) if value >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probabilities[less] = round(scaled[less] * ALIAS_SCALE)
+            aliases[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # Whatever is left over only differs from 1 by rounding errors and keeps ALIAS_SCALE
+        self.probabilities = probabilities
+        self.aliases = aliases
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def draw(self, rng):
+        """Draw one index using rng.randint, e.g. a random.Random or generator.QuestRandom
+
+        A column that never takes its alias needs no second draw, so equal
+        weights consume the same draws as a plain rng.randint(0, n - 1).
+        """
+        column = rng.randint(0, len(self.probabilities) - 1)
+        threshold = self.probabilities[column]
+        if threshold == ALIAS_SCALE or rng.randint(0, ALIAS_SCALE - 1) < threshold:
+            return column
+        return self.aliases[column]
+
+    def sample(self, count, seed=0):
+        """Draw count indexes at once as a list, using NumPy when it is installed"""
+        numpy = load_numpy()
+        if numpy is not None:
+            if self._arrays is None:
+                self._arrays = (numpy.array(self.probabilities, dtype=numpy.int64),
+                                numpy.array(self.aliases, dtype=numpy.int64))
+            probabilities, aliases = self._arrays
+            rng = numpy.random.default_rng(seed)
+            columns = rng.integers(0, len(probabilities), count)
+            coins = rng.integers(0, ALIAS_SCALE, count)
+            return numpy.where(coins < probabilities[columns], columns, aliases[columns]).tolist()
+        rng = random.Random(seed)
+        return [self.draw(rng) for _ in range(count)]
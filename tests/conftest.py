@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generator import QuestGenerator
+
+# Small catalogs for every category that has one, in the shapes of List/
+CATALOGS = {
+    'mobs_by_rarity.yml': 'hard:\n  - Warden\n  - Wither\nrare:\n  - Witch\ncommon:\n  - Zombie\n  - Skeleton\n',
+    'blocks_by_rarity.yml': 'common:\n  - Stone\n  - Dirt\nrare:\n  - Obsidian\nhard:\n  - Ancient_Debris\n',
+    'food_by_rarity.yml': 'common:\n  - Bread\nrare:\n  - Cake\nhard:\n  - Golden_Apple\n',
+    'smeltable.yml': '- Glass\n- Brick\n',
+    'tamable.yml': '- Wolf\n- Cat\n',
+    'rideable.yml': '- Horse\n',
+}
+
+@pytest.fixture
+def list_dir(tmp_path):
+    """A List/ folder with the test catalogs"""
+    directory = tmp_path / 'List'
+    directory.mkdir()
+    for filename, content in CATALOGS.items():
+        (directory / filename).write_text(content)
+    return str(directory)
+
+def read_quest_files(quests_dir):
+    """Contents of every quest file in a folder, by filename"""
+    files = {}
+    for filename in sorted(os.listdir(quests_dir)):
+        if filename.endswith('.yml'):
+            with open(os.path.join(quests_dir, filename)) as file:
+                files[filename] = file.read()
+    return files
+
+@pytest.fixture
+def generate(list_dir, tmp_path):
+    """Run the generator on the test catalogs into a folder of tmp_path, returning its quest files"""
+    def generate(folder='Quests', **options):
+        quests_dir = str(tmp_path / folder)
+        QuestGenerator(list_dir, quests_dir, None).run(quests_dir=quests_dir, **options)
+        return read_quest_files(quests_dir)
+    return generate
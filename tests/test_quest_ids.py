@@ -0,0 +1,68 @@
+import os
+
+import pytest
+import yaml
+
+from generator import LIST_DIR, QUEST_TYPES, QuestGenerator
+
+def ids_of(quests):
+    return {quest.id: quest.variable for quest in quests}
+
+def test_ids_follow_baseline_numbering(list_dir, tmp_path):
+    # One counter per category across its tiers, in tier order
+    generator = QuestGenerator(list_dir, str(tmp_path / 'Quests'), None)
+    assert ids_of(generator.generate_records('mobs', 1)) == {
+        'hard_1': 'Warden', 'hard_2': 'Wither', 'rare_3': 'Witch', 'common_4': 'Zombie', 'common_5': 'Skeleton',
+    }
+    assert ids_of(generator.generate_records('mining', 1)) == {
+        'hard_mine_1': 'Ancient_Debris', 'rare_mine_2': 'Obsidian', 'common_mine_3': 'Stone', 'common_mine_4': 'Dirt',
+    }
+    assert ids_of(generator.generate_records('smelting', 1)) == {'smelt_1': 'Glass', 'smelt_2': 'Brick'}
+    assert ids_of(generator.generate_records('sprint', 1)) == {'sprint_2': None}
+
+@pytest.mark.filterwarnings('ignore::generator.CatalogWarning')
+def test_ids_of_shipped_catalogs_match_the_original_script(tmp_path):
+    generator = QuestGenerator(LIST_DIR, str(tmp_path / 'Quests'), None)
+    for category, spec in QUEST_TYPES.items():
+        if 'catalog' not in spec:
+            expected = {f"{spec['prefix']}2": None}
+        else:
+            with open(os.path.join(LIST_DIR, spec['catalog'])) as file:
+                catalog = yaml.safe_load(file)
+            tiers = spec.get('tiers') or [(None, spec['prefix'], None)]
+            entries = [(prefix, entry) for rarity, prefix, _ in tiers
+                       for entry in (catalog[rarity] if rarity else catalog)]
+            expected = {f'{prefix}{number}': entry['name'] if isinstance(entry, dict) else entry
+                        for number, (prefix, entry) in enumerate(entries, 1)}
+        assert ids_of(generator.generate_records(category, 1)) == expected, category
+
+def write_mobs(list_dir, catalog):
+    with open(os.path.join(list_dir, 'mobs_by_rarity.yml'), 'w') as file:
+        yaml.safe_dump(catalog, file)
+
+def other_files(files):
+    # Every quest file but the ones that hold the mob quests
+    return {name: text for name, text in files.items() if name not in ('mobs.yml', 'extra.yml')}
+
+def test_adding_an_entry_only_adds_its_quest(list_dir, generate):
+    before = generate(seed=5)
+    write_mobs(list_dir, {'hard': ['Warden', 'Wither'], 'rare': ['Witch'], 'common': ['Creeper', 'Zombie', 'Skeleton']})
+    after = generate(seed=5)
+
+    assert other_files(after) == other_files(before)
+    for filename in ('mobs.yml', 'extra.yml'):
+        old, new = yaml.safe_load(before[filename]), yaml.safe_load(after[filename])
+        # The new entry is numbered after every existing quest
+        assert new == {**old, 'common_6': new['common_6']}
+        assert new['common_6']['variable'] == 'Creeper'
+
+def test_removing_an_entry_only_removes_its_quest(list_dir, generate):
+    before = generate(seed=5)
+    write_mobs(list_dir, {'hard': ['Warden', 'Wither'], 'rare': [], 'common': ['Zombie', 'Skeleton']})
+    after = generate(seed=5)
+
+    assert other_files(after) == other_files(before)
+    for filename in ('mobs.yml', 'extra.yml'):
+        old, new = yaml.safe_load(before[filename]), yaml.safe_load(after[filename])
+        assert old.pop('rare_3')['variable'] == 'Witch'
+        assert new == old
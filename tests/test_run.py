@@ -0,0 +1,23 @@
+import os
+import shutil
+
+def test_jobs_match_a_serial_run(generate):
+    assert generate('parallel', seed=5, jobs=3) == generate('serial', seed=5)
+
+def test_incremental_run_matches_a_full_run(list_dir, generate, tmp_path):
+    generate('full', seed=5)
+    shutil.copytree(tmp_path / 'full', tmp_path / 'incremental')
+    shutil.copytree(tmp_path / 'full', tmp_path / 'parallel')
+    with open(os.path.join(list_dir, 'smeltable.yml'), 'a') as file:
+        file.write('- Charcoal\n')
+    with open(os.path.join(list_dir, 'tamable.yml'), 'w') as file:
+        file.write('- Cat\n')
+
+    full = generate('full', seed=5)
+    # The seed of the last run is reused
+    assert generate('incremental', incremental=True) == full
+    assert generate('parallel', incremental=True, jobs=3) == full
+
+def test_incremental_run_without_changes_keeps_every_file(generate):
+    before = generate(seed=5)
+    assert generate(incremental=True) == before